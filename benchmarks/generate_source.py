@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+
+# Deterministic generator of synthetic rgbpre sources. The same parameters
+# and seed always produce the same text, so timings of different revisions
+# can be compared.
+import argparse
+import random
+from typing import List
+
+ALIAS_REGISTERS = ["b", "c", "d", "e", "h", "l", "bc", "de", "hl"]
+ATTRIBUTE_TYPES = ["byte", "half", "word", "long"]
+NESTED_BLOCK_KINDS = ["", "lp", "if"]
+INSTRUCTIONS = ["ld a, {0}", "inc {0}", "dec {0}", "ld {0}, $00", "cp {0}"]
+
+class SourceParameters:
+  def __init__(self,
+               functions: int,
+               depth: int,
+               aliases: int,
+               structs: int,
+               variables: int,
+               seed: int = 0):
+    self._functions = functions
+    self._depth = depth
+    self._aliases = aliases
+    self._structs = structs
+    self._variables = variables
+    self._seed = seed
+
+  @property
+  def functions(self) -> int:
+    return self._functions
+
+  @property
+  def depth(self) -> int:
+    return self._depth
+
+  @property
+  def aliases(self) -> int:
+    return self._aliases
+
+  @property
+  def structs(self) -> int:
+    return self._structs
+
+  @property
+  def variables(self) -> int:
+    return self._variables
+
+  @property
+  def seed(self) -> int:
+    return self._seed
+
+  def to_dict(self) -> dict:
+    return {"functions": self._functions,
+            "depth": self._depth,
+            "aliases": self._aliases,
+            "structs": self._structs,
+            "variables": self._variables,
+            "seed": self._seed}
+
+def generate_source(parameters: SourceParameters) -> str:
+  generator = random.Random(parameters.seed)
+  lines = [f"; Synthetic benchmark source {parameters.to_dict()}",
+           "section \"start\", rom0[$0100]",
+           "  nop",
+           "  jp bench_main",
+           ""]
+
+  for idx in range(parameters.structs):
+    lines += _generate_struct(generator, idx)
+
+  lines += ["blk prg",
+            "  .name: bench_main",
+            "bgn"]
+  lines += _generate_variables(generator, "main", parameters, "  ")
+  for idx in range(parameters.functions):
+    lines.append(f"  call function_{idx}")
+  lines += ["end ; prg", ""]
+
+  for idx in range(parameters.functions):
+    lines += _generate_function(generator, idx, parameters)
+  return "\n".join(lines) + "\n"
+
+def _generate_struct(generator: random.Random, idx: int) -> List[str]:
+  lines = ["blk ds",
+           f"  .name: struct_{idx}",
+           "bgn"]
+  for attribute in range(generator.randint(1, 4)):
+    lines.append(f"  attr field_{attribute}, {generator.choice(ATTRIBUTE_TYPES)}")
+  return lines + ["end", ""]
+
+def _generate_variables(generator: random.Random,
+                        prefix: str,
+                        parameters: SourceParameters,
+                        indentation: str) -> List[str]:
+  lines = []
+  for idx in range(parameters.variables):
+    if parameters.structs != 0 and generator.random() < 0.5:
+      type = f"struct_{generator.randrange(parameters.structs)}"
+    else:
+      type = generator.choice(ATTRIBUTE_TYPES)
+    lines.append(f"{indentation}var {prefix}_var_{idx}, {type}, stack")
+  for idx in range(parameters.variables):
+    lines.append(f"{indentation}ld a, {prefix}_var_{idx}")
+  return lines
+
+def _generate_aliases(generator: random.Random,
+                      prefix: str,
+                      count: int,
+                      indentation: str) -> List[str]:
+  lines = []
+  names = []
+  for idx in range(count):
+    name = f"{prefix}_alias_{idx}"
+    lines.append(f"{indentation}als {generator.choice(ALIAS_REGISTERS)}, {name}")
+    names.append(name)
+  for name in names:
+    lines.append(f"{indentation}{generator.choice(INSTRUCTIONS).format(name)}")
+  return lines
+
+def _generate_nested_block(generator: random.Random,
+                           prefix: str,
+                           level: int,
+                           parameters: SourceParameters,
+                           indentation: str) -> List[str]:
+  if level == parameters.depth:
+    return []
+
+  kind = NESTED_BLOCK_KINDS[level % len(NESTED_BLOCK_KINDS)]
+  lines = [f"{indentation}blk {kind}".rstrip()]
+  if kind == "if":
+    lines.append(f"{indentation}  .cnd: a eq ${generator.randrange(256):02X}")
+  lines.append(f"{indentation}bgn")
+  lines += _generate_aliases(generator, f"{prefix}_{level}", parameters.aliases, indentation + "  ")
+  lines += _generate_nested_block(generator, prefix, level + 1, parameters, indentation + "  ")
+  if kind == "lp":
+    lines.append(f"{indentation}  break")
+  lines.append(f"{indentation}end")
+  return lines
+
+def _generate_function(generator: random.Random,
+                       idx: int,
+                       parameters: SourceParameters) -> List[str]:
+  prefix = f"function_{idx}"
+  lines = ["blk fn",
+           f"  .name: {prefix}",
+           "bgn"]
+  lines += _generate_variables(generator, prefix, parameters, "  ")
+  lines += _generate_aliases(generator, prefix, parameters.aliases, "  ")
+  lines += _generate_nested_block(generator, prefix, 0, parameters, "  ")
+  lines += ["  ret", "end ; fn", ""]
+  return lines
+
+def main():
+  parser = argparse.ArgumentParser(description='synthetic rgbpre source generator')
+  parser.add_argument('-o', '--output', type=str, required=True,
+                      help='Output file name')
+  parser.add_argument('--functions', type=int, default=10,
+                      help="Number of 'blk fn' functions")
+  parser.add_argument('--depth', type=int, default=3,
+                      help='Nesting depth of the blocks inside each function')
+  parser.add_argument('--aliases', type=int, default=4,
+                      help="Number of 'als' aliases per scope")
+  parser.add_argument('--structs', type=int, default=2,
+                      help="Number of 'blk ds' structs")
+  parser.add_argument('--variables', type=int, default=2,
+                      help="Number of 'var' declarations per function")
+  parser.add_argument('--seed', type=int, default=0,
+                      help='Random seed')
+  args = parser.parse_args()
+
+  parameters = SourceParameters(args.functions,
+                                args.depth,
+                                args.aliases,
+                                args.structs,
+                                args.variables,
+                                args.seed)
+  with open(args.output, 'w') as f:
+    f.write(generate_source(parameters))
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+
+# Times the include directive scanner on pathological lines of growing
+# length: unterminated quotes, text after the closing quote and long paths.
+# The time per character must stay flat. The regex it replaced is timed on
+# the same lines for short lengths only, its time grows exponentially.
+import argparse
+import json
+import os
+import platform
+import re
+import sys
+import time
+from typing import Callable, List
+
+current = os.path.dirname(os.path.realpath(__file__))
+sys.path.append(os.path.join(os.path.dirname(current), "scripts"))
+
+from support.include_directive import scan_include_directive
+
+RESULTS_VERSION = 1
+LEGACY_INCLUDE_PATTERN = re.compile(r"^(include)(\s)*\"((\w)+|(\/)*|(\w+)*|(.))+\"(\s)*$")
+CASES = {
+  "unterminated": lambda n: 'include "' + "a" * n,
+  "trailing_text": lambda n: 'include "' + "a" * n + '" x',
+  "slashes": lambda n: 'include "' + "a/" * (n // 2),
+  "valid": lambda n: 'include "' + "a" * n + '"'
+}
+
+def time_scan(scan: Callable[[str], object], line: str, repeat: int) -> float:
+  best = None
+  for _ in range(repeat):
+    start = time.perf_counter()
+    scan(line)
+    elapsed = time.perf_counter() - start
+    best = elapsed if best == None else min(best, elapsed)
+  return best
+
+def run_case(name: str, lengths: List[int], legacy_max: int, repeat: int) -> List[dict]:
+  results = []
+  for length in lengths:
+    line = CASES[name](length)
+    result = {"case": name,
+              "length": length,
+              "scanner": time_scan(scan_include_directive, line, repeat),
+              "legacy": None}
+    if length <= legacy_max:
+      result["legacy"] = time_scan(LEGACY_INCLUDE_PATTERN.match, line, 1)
+    results.append(result)
+  return results
+
+def print_results(results: List[dict]) -> None:
+  print(f"{'case':<16}{'length':>10}{'scanner (ms)':>14}{'ns/char':>10}{'legacy (ms)':>14}")
+  for result in results:
+    legacy = f"{result['legacy'] * 1000:>14.3f}" if result["legacy"] != None else f"{'-':>14}"
+    print(f"{result['case']:<16}{result['length']:>10}{result['scanner'] * 1000:>14.3f}"
+          f"{result['scanner'] * 1e9 / result['length']:>10.2f}{legacy}")
+
+def print_comparison(results: List[dict], baseline: dict) -> None:
+  baseline_results = {(x["case"], x["length"]): x for x in baseline["results"]}
+  print(f"\n{'case':<16}{'length':>10}{'baseline (ms)':>14}{'current (ms)':>14}{'ratio':>8}")
+  for result in results:
+    reference = baseline_results.get((result["case"], result["length"]))
+    if reference == None:
+      continue
+    before = reference["scanner"]
+    after = result["scanner"]
+    ratio = after / before if before != 0 else 0
+    print(f"{result['case']:<16}{result['length']:>10}{before * 1000:>14.3f}{after * 1000:>14.3f}{ratio:>8.2f}")
+
+def main():
+  parser = argparse.ArgumentParser(description='include directive scanner benchmark')
+  parser.add_argument('--lengths', type=str, default="8,1000,100000,1000000",
+                      help='Comma separated line lengths')
+  parser.add_argument('--legacy-max', type=int, default=8,
+                      help='Longest line given to the legacy regex, it needs seconds past 10')
+  parser.add_argument('--repeat', type=int, default=5,
+                      help='Runs per line, the fastest one is kept')
+  parser.add_argument('-o', '--output', type=str,
+                      help='Write the results as JSON')
+  parser.add_argument('--compare', type=str,
+                      help='Compare with the JSON results of a previous run')
+  args = parser.parse_args()
+
+  lengths = [int(x) for x in args.lengths.split(',')]
+  results = []
+  for name in CASES:
+    results += run_case(name, lengths, args.legacy_max, args.repeat)
+
+  print_results(results)
+  if args.output != None:
+    with open(args.output, 'w') as f:
+      json.dump({"version": RESULTS_VERSION,
+                 "python": platform.python_version(),
+                 "results": results}, f, indent=2)
+      f.write("\n")
+
+  if args.compare != None:
+    with open(args.compare, 'r') as f:
+      print_comparison(results, json.load(f))
+
+if __name__ == "__main__":
+  main()
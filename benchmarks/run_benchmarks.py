@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+
+# Times process_file and each of its passes on generated sources of growing
+# size. Results are saved as JSON and can be compared with a previous run.
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from typing import List
+
+current = os.path.dirname(os.path.realpath(__file__))
+sys.path.append(current)
+sys.path.append(os.path.join(os.path.dirname(current), "scripts"))
+
+from generate_source import (
+  SourceParameters,
+  generate_source
+)
+from rgbpre import process_request
+from support.include_cache import IncludeCache
+from support.pass_context import PassContext
+from support.profiler import PassProfiler
+
+RESULTS_VERSION = 1
+
+def run_size(parameters: SourceParameters, work_dir: str, repeat: int) -> dict:
+  source = generate_source(parameters)
+  input_file = os.path.join(work_dir, f"bench_{parameters.functions}.z80")
+  output_file = os.path.join(work_dir, f"bench_{parameters.functions}.pre.z80")
+  with open(input_file, 'w') as f:
+    f.write(source)
+
+  # Best of 'repeat' runs without call tracing, then one traced run for the counters
+  best_time = None
+  best_passes = {}
+  for _ in range(repeat):
+    profiler = PassProfiler(trace_calls=False)
+    start = time.perf_counter()
+    run_pipeline(input_file, output_file, work_dir, profiler)
+    elapsed = time.perf_counter() - start
+    best_time = elapsed if best_time == None else min(best_time, elapsed)
+    for profile in profiler.profiles:
+      best_passes[profile.name] = min(best_passes.get(profile.name, profile.wall_time), profile.wall_time)
+
+  profiler = PassProfiler()
+  run_pipeline(input_file, output_file, work_dir, profiler)
+  passes = {}
+  for profile in profiler.profiles:
+    passes[profile.name] = {"wall_time": best_passes[profile.name],
+                            "line_visits": profile.line_visits,
+                            "line_rewrites": profile.line_rewrites,
+                            "regex_evaluations": profile.regex_evaluations}
+
+  return {"parameters": parameters.to_dict(),
+          "lines": source.count("\n"),
+          "process_file": best_time,
+          "passes": passes}
+
+def run_pipeline(input_file: str, output_file: str, work_dir: str, profiler: PassProfiler) -> None:
+  # A fresh cache per run, diagnostics stay in the context
+  process_request(PassContext(input_file, [work_dir], IncludeCache(), profiler), output_file)
+
+def print_results(results: List[dict]) -> None:
+  print(f"{'functions':>10}{'lines':>8}{'total (ms)':>12}  slowest pass")
+  for result in results:
+    name, data = max(result["passes"].items(), key=lambda x: x[1]["wall_time"])
+    print(f"{result['parameters']['functions']:>10}{result['lines']:>8}"
+          f"{result['process_file'] * 1000:>12.2f}  {name} ({data['wall_time'] * 1000:.2f} ms)")
+
+def print_comparison(results: List[dict], baseline: dict) -> None:
+  baseline_results = {x["parameters"]["functions"]: x for x in baseline["results"]}
+  print(f"\n{'functions':>10}  {'step':<24}{'baseline (ms)':>14}{'current (ms)':>14}{'ratio':>8}")
+  for result in results:
+    size = result["parameters"]["functions"]
+    if size not in baseline_results:
+      continue
+    reference = baseline_results[size]
+    steps = [("process_file", reference["process_file"], result["process_file"])]
+    for name, data in result["passes"].items():
+      if name in reference["passes"]:
+        steps.append((name, reference["passes"][name]["wall_time"], data["wall_time"]))
+    for name, before, after in steps:
+      ratio = after / before if before != 0 else 0
+      print(f"{size:>10}  {name:<24}{before * 1000:>14.2f}{after * 1000:>14.2f}{ratio:>8.2f}")
+
+def main():
+  parser = argparse.ArgumentParser(description='rgbpre pass pipeline benchmarks')
+  parser.add_argument('--sizes', type=str, default="10,50,100,200",
+                      help="Comma separated numbers of 'blk fn' functions")
+  parser.add_argument('--depth', type=int, default=3,
+                      help='Nesting depth of the blocks inside each function')
+  parser.add_argument('--aliases', type=int, default=4,
+                      help="Number of 'als' aliases per scope")
+  parser.add_argument('--structs', type=int, default=4,
+                      help="Number of 'blk ds' structs")
+  parser.add_argument('--variables', type=int, default=2,
+                      help="Number of 'var' declarations per function")
+  parser.add_argument('--seed', type=int, default=0,
+                      help='Random seed of the generator')
+  parser.add_argument('--repeat', type=int, default=3,
+                      help='Runs per size, the fastest one is kept')
+  parser.add_argument('-o', '--output', type=str,
+                      help='Write the results as JSON')
+  parser.add_argument('--compare', type=str,
+                      help='Compare with the JSON results of a previous run')
+  args = parser.parse_args()
+
+  results = []
+  with tempfile.TemporaryDirectory() as work_dir:
+    for size in [int(x) for x in args.sizes.split(',')]:
+      parameters = SourceParameters(size,
+                                    args.depth,
+                                    args.aliases,
+                                    args.structs,
+                                    args.variables,
+                                    args.seed)
+      results.append(run_size(parameters, work_dir, args.repeat))
+
+  print_results(results)
+  if args.output != None:
+    with open(args.output, 'w') as f:
+      json.dump({"version": RESULTS_VERSION,
+                 "python": platform.python_version(),
+                 "results": results}, f, indent=2)
+      f.write("\n")
+
+  if args.compare != None:
+    with open(args.compare, 'r') as f:
+      print_comparison(results, json.load(f))
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+# Times cold starts of rgbpre.py on an empty program, every run is a new
+# interpreter as in a build. The start up of a bare interpreter is measured
+# too, so that the time spent importing and running rgbpre is visible.
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Tuple
+
+current = os.path.dirname(os.path.realpath(__file__))
+RGBPRE = os.path.join(os.path.dirname(current), "scripts", "rgbpre.py")
+
+RESULTS_VERSION = 1
+EMPTY_PROGRAM = "blk prg\n  .name: main\nbgn\nend\n"
+
+def time_command(command: List[str], repeat: int) -> dict:
+  times = []
+  for _ in range(repeat):
+    start = time.perf_counter()
+    subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+    times.append(time.perf_counter() - start)
+  return {"min": min(times), "median": statistics.median(times)}
+
+def get_import_times(command: List[str], count: int) -> List[Tuple[str, float]]:
+  # Slowest top level imports reported by '-X importtime', in seconds
+  result = subprocess.run([command[0], "-X", "importtime"] + command[1:], check=True,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+  imports = []
+  for line in result.stderr.splitlines():
+    fields = line.split("|")
+    if len(fields) != 3 or not fields[1].strip().isdigit():
+      continue
+    name = fields[2].rstrip()
+    # Top level imports are indented by a single space
+    if not name.startswith("  "):
+      imports.append((name.strip(), int(fields[1]) / 1e6))
+  return sorted(imports, key=lambda x: x[1], reverse=True)[:count]
+
+def print_comparison(results: dict, baseline: dict) -> None:
+  print(f"\n{'step':<12}{'baseline (ms)':>14}{'current (ms)':>14}{'ratio':>8}")
+  for name in ["interpreter", "rgbpre"]:
+    before = baseline[name]["min"]
+    after = results[name]["min"]
+    ratio = after / before if before != 0 else 0
+    print(f"{name:<12}{before * 1000:>14.2f}{after * 1000:>14.2f}{ratio:>8.2f}")
+
+def main():
+  parser = argparse.ArgumentParser(description='rgbpre cold start benchmark')
+  parser.add_argument('--repeat', type=int, default=20,
+                      help='Number of cold starts')
+  parser.add_argument('--imports', type=int, default=10,
+                      help='Number of slowest imports to report')
+  parser.add_argument('-o', '--output', type=str,
+                      help='Write the results as JSON')
+  parser.add_argument('--compare', type=str,
+                      help='Compare with the JSON results of a previous run')
+  args = parser.parse_args()
+
+  with tempfile.TemporaryDirectory() as work_dir:
+    input_file = os.path.join(work_dir, "empty.z80")
+    with open(input_file, 'w') as f:
+      f.write(EMPTY_PROGRAM)
+    command = [sys.executable, RGBPRE, "-i", input_file,
+               "-o", os.path.join(work_dir, "empty.pre.z80"), "--no-cache"]
+
+    results = {"interpreter": time_command([sys.executable, "-c", "pass"], args.repeat),
+               "rgbpre": time_command(command, args.repeat),
+               "imports": get_import_times(command, args.imports)}
+
+  print(f"{'step':<12}{'min (ms)':>12}{'median (ms)':>14}")
+  for name in ["interpreter", "rgbpre"]:
+    print(f"{name:<12}{results[name]['min'] * 1000:>12.2f}{results[name]['median'] * 1000:>14.2f}")
+  print(f"\n{'import':<32}{'time (ms)':>12}")
+  for name, elapsed in results["imports"]:
+    print(f"{name:<32}{elapsed * 1000:>12.2f}")
+
+  if args.output != None:
+    with open(args.output, 'w') as f:
+      json.dump({"version": RESULTS_VERSION,
+                 "python": platform.python_version(),
+                 "results": results}, f, indent=2)
+      f.write("\n")
+
+  if args.compare != None:
+    with open(args.compare, 'r') as f:
+      print_comparison(results, json.load(f)["results"])
+
+if __name__ == "__main__":
+  main()
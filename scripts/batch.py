@@ -0,0 +1,147 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+from constants import KEYWORD_INCLUDE
+from passes.find_includes_pass import FindIncludesPass
+from rgbpre import process_request
+from support.include_cache import IncludeCache
+from support.include_directive import scan_include_directive
+from support.pass_context import PassContext
+from utils import Utils
+
+BATCH_OUTPUT_SUFFIX = ".pre.z80"
+
+# Include cache of a worker process, handed over by the parent process
+_worker_cache = None
+
+def get_batch_output_path(input_file: str, output_dir: str) -> str:
+  stem = os.path.splitext(os.path.basename(input_file))[0]
+  return os.path.join(output_dir, f"{stem}{BATCH_OUTPUT_SUFFIX}")
+
+def read_manifest(manifest_file: str, output_dir: Optional[str]) -> List[Tuple[str, str]]:
+  # One 'input [output]' entry per line, paths relative to the manifest
+  base_dir = os.path.dirname(os.path.abspath(manifest_file))
+  jobs = []
+  with open(manifest_file, 'r') as f:
+    for idx, line in enumerate(f):
+      tokens = line.split('#', 1)[0].split()
+      if len(tokens) == 0:
+        continue
+      elif len(tokens) > 2:
+        raise RuntimeError(f"{os.path.basename(manifest_file)} line {idx + 1}: expected 'input [output]'")
+
+      input_file = os.path.join(base_dir, tokens[0])
+      if len(tokens) == 2:
+        output_file = os.path.join(base_dir, tokens[1])
+      elif output_dir != None:
+        output_file = get_batch_output_path(input_file, output_dir)
+      else:
+        raise RuntimeError(f"{os.path.basename(manifest_file)} line {idx + 1}: no output file and no output directory")
+      jobs.append((input_file, output_file))
+  return jobs
+
+def get_batch_jobs(input_files: List[str], output_dir: str) -> List[Tuple[str, str]]:
+  return [(x, get_batch_output_path(x, output_dir)) for x in input_files]
+
+def run_batch(jobs: List[Tuple[str, str]],
+              include_path: List[str],
+              cache: IncludeCache,
+              worker_count: int) -> int:
+  outputs = set()
+  for _, output_file in jobs:
+    if os.path.abspath(output_file) in outputs:
+      raise RuntimeError(f"output file '{output_file}' is produced by more than one input")
+    outputs.add(os.path.abspath(output_file))
+    os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
+
+  # Scan the shared headers once, the workers start with a warm cache
+  warm_include_cache(jobs, include_path, cache)
+
+  if worker_count <= 1 or len(jobs) == 1:
+    _init_worker(cache)
+    results = [_process_job(x, y, include_path) for x, y in jobs]
+  else:
+    with ProcessPoolExecutor(max_workers=min(worker_count, len(jobs)),
+                             initializer=_init_worker,
+                             initargs=(cache,)) as executor:
+      results = executor.map(_process_job,
+                             [x for x, _ in jobs],
+                             [y for _, y in jobs],
+                             [include_path] * len(jobs))
+      results = list(results)
+
+  failures = 0
+  for input_file, output_file, diagnostics, error in results:
+    print(f"{input_file} -> {output_file}")
+    print(diagnostics, end='')
+    if len(error) != 0:
+      print(error)
+      failures += 1
+  return failures
+
+def warm_include_cache(jobs: List[Tuple[str, str]],
+                       include_path: List[str],
+                       cache: IncludeCache) -> None:
+  # Only the headers are scanned here, the inputs are read for their include
+  # directives and left to the workers for everything else
+  headers = []
+  known = set()
+  for input_file, _ in jobs:
+    for include in find_top_level_includes(input_file):
+      header = Utils.find_file(include, include_path)
+      if header != None and IncludeCache.identify(header)[0] not in known:
+        known.add(IncludeCache.identify(header)[0])
+        headers.append(header)
+
+  if len(headers) == 0:
+    return
+
+  # Same scanner as the workers, so they reuse the cached scans as they are
+  scanner = FindIncludesPass(PassContext(jobs[0][0], include_path, cache))
+  position = 0
+  while position < len(headers):
+    try:
+      scan = scanner.scan_include(headers[position])
+    except Exception:
+      # Reported by the worker that includes this header
+      scan = None
+    position += 1
+    if scan == None:
+      continue
+
+    for include, _ in scan.includes:
+      header = Utils.find_file(include, include_path)
+      if header != None and IncludeCache.identify(header)[0] not in known:
+        known.add(IncludeCache.identify(header)[0])
+        headers.append(header)
+
+def find_top_level_includes(input_file: str) -> List[str]:
+  # Same directives FindIncludesPass follows, without lexing the input
+  includes = []
+  try:
+    with open(input_file, 'r') as f:
+      for line in f:
+        if line.startswith(KEYWORD_INCLUDE):
+          directive = scan_include_directive(Utils.extract_line_no_comments(line))
+          if directive != None:
+            includes.append(directive.path)
+  except OSError:
+    # Reported by the worker that processes this input
+    pass
+  return includes
+
+def _init_worker(cache: IncludeCache) -> None:
+  global _worker_cache
+  _worker_cache = cache
+
+def _process_job(input_file: str,
+                 output_file: str,
+                 include_path: List[str]) -> Tuple[str, str, str, str]:
+  context = PassContext(input_file, include_path, _worker_cache)
+  error = ""
+  try:
+    process_request(context, output_file)
+  except Exception as e:
+    error = f"{type(e).__name__}: {e}"
+  return (input_file, output_file, context.format_diagnostics(), error)
@@ -45,15 +45,14 @@ VARIABLE_BASIC_TYPES = [KEYWORD_BYTE, KEYWORD_HALF, KEYWORD_WORD, KEYWORD_LONG]
 # Assembler
 KEYWORD_DEF = "def"
 KEYWORD_EQU = "equ"
+KEYWORD_INCLUDE = "include"
+KEYWORD_INCBIN = "incbin"
 
 # Regex Templates
 ALIAS_REGEX = r"^(\s)*" + KEYWORD_ALIAS + "(\s)*(\w)+,(.)*$"
-BLOCK_HEADER_BLK_REGEX = r"(\s)*blk(\s)*"
-BLOCK_HEADER_PRG_REGEX = r"(\s)*blk(\s)+prg(\s)*"
-BLOCK_HEADER_LP_REGEX =  r"(\s)*blk(\s)+lp(\s)*"
-BLOCK_HEADER_IF_REGEX =  r"(\s)*blk(\s)+if(\s)*"
-BLOCK_HEADER_FN_REGEX =  r"(\s)*blk(\s)+fn(\s)*"
-BLOCK_HEADER_DS_REGEX =  r"(\s)*blk(\s)+ds(\s)*"
+# Classifies a line as a block declaration ('blk [kind]'), 'bgn'/'{' or 'end'/'}'
+BLOCK_MARKER_REGEX = r"^\s*(?:(?P<decl>" + KEYWORD_BLOCK + r")(?:\s+(?P<kind>\S+))?(?P<extra>\s+\S(?:.*\S)?)?" +\
+                     r"|(?P<bgn>bgn|\{)|(?P<end>end|\}))\s*$"
 
 IDENTIFIER_REGEX = r"([a-zA-Z_$][a-zA-Z_$0-9]*)"
 
@@ -67,12 +66,6 @@ BLOCK_DS_REGEX =  r"(\s)*blk(\s)+ds(\s)+" + KEYWORD_NAME_FOR_REGEX + r"(\s)+"+ID
 ATTRIBUTE_DECLARATION_REGEX = r"^(\s)*" + KEYWORD_ATTRIBUTE + r"(\s)+" + IDENTIFIER_REGEX + r"(\s)*,(\s)*(\w)+(\s)*$"
 
 NAME_REGEX = r"^(\s)*" + KEYWORD_NAME_FOR_REGEX + r"(\s)*"+ IDENTIFIER_REGEX +r"(\s)*$"
-END_REGEX = r"^(\s)*(end|\})" + r"(\s)*$"
-BGN_REGEX = r"^(\s)*(bgn|\{)" + r"(\s)*$"
-CONDITION_REGEX = r"^(\s)*\.cnd:(\s)+\$?((\[)?(.*)(\])?)(\s)+" +\
-                  r"(ge|gt|eq|ne|le|lt|\=\=|\!\=|\>|\<|\<\=|\>\=)(\s)+" +\
-                  r"\$?((\[)?(.*)(\])?)(\s)*(and|or|\&\&|\|\|)?(\s)*$"
-INCLUDE_REGEX = r"^(include)(\s)*\"((\w)+|(\/)*|(\w+)*|(.))+\"(\s)*$"
 MEMORY_ALIAS_REGEX = r"^(\s)*(DEF|def)?(_|\w)*(\s)+(EQU|equ)(\s)*"
 MACRO_REGEX = r"^(\s)*((_|(\w)*))(\s)*(:)(\s)*(macro|MACRO)(\s)*$"
 LABEL_REGEX = r"^(\s)*(\.)?((_|(\w)*))(\s)*(:)(\s)*$"
@@ -89,6 +82,8 @@ TOKEN_LESS_THAN_EQ_TO = ["le", "LE", "<="]
 TOKEN_GREATER_THAN = ["gt", "GT", ">"]
 TOKEN_GREATER_THAN_EQ_TO = ["ge", "GE", ">="]
 LOGICAL_OPERATORS = ["and", "or", "&&", "||"]
+TOKEN_AND = ["and", "&&"]
+TOKEN_OR = ["or", "||"]
 TOKEN_REGISTER_A = ["a", "A"]
 TOKEN_REGISTER_B = ["b", "B"]
 TOKEN_REGISTER_C = ["c", "C"]
@@ -168,3 +163,6 @@ KEYWORD_RETURN, KEYWORD_RETURN.upper(), KEYWORD_RETURN_I, KEYWORD_RETURN_I.upper
 KEYWORD_ELSE, KEYWORD_ELSE.upper(), KEYWORD_CND, KEYWORD_CND.upper(), KEYWORD_DATA_STRUCT, KEYWORD_DATA_STRUCT.upper(),
 KEYWORD_DEF, KEYWORD_DEF.upper(), KEYWORD_EQU, KEYWORD_EQU.upper(), KEYWORD_VAR, KEYWORD_LONG, KEYWORD_WORD, KEYWORD_HALF, KEYWORD_HALF, KEYWORD_ATTRIBUTE,
 KEYWORD_STACK, KEYWORD_HEAP]
+
+# Keywords are case insensitive, lookups are done on the lower case form
+KEYWORD_LOOKUP = frozenset(x.lower() for x in KEYWORDS)
@@ -1,4 +1,4 @@
-from enum import Enum
+from enum import Enum, IntFlag
 
 class LabelOperation(Enum):
   DEF_LABEL = "DEF_LABEL"
@@ -18,6 +18,19 @@ class BlockType(Enum):
   PRG_BLOCK = "PRG_BLOCK"
   NONE_BLOCK = "NONE_BLOCK" # Used to mark an 'end' token
 
+class SourceFeature(IntFlag):
+  # Constructs found in a source while mapping its blocks
+  NONE = 0
+  PRG_BLOCK = 1
+  FNC_BLOCK = 2
+  DS_BLOCK = 4
+  IF_BLOCK = 8
+  LP_BLOCK = 16
+  GENERIC_BLOCK = 32
+  ALIAS = 64
+  VARIABLE = 128
+  BRANCH = 256 # 'call', 'jp' or 'jr'
+
 class FunctionArgumentType(Enum):
   IN_ARG = "IN_ARG"
   OUT_ARG = "OUT_ARG"
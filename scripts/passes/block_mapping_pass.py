@@ -1,38 +1,70 @@
-from asyncio import constants
 import os
 import re
 from typing import List, Tuple
 
-from numpy import block
-
 from constants import *
 from enums import (
   BlockMarkerType,
-  BlockType
+  BlockType,
+  SourceFeature
 )
 from support.block import (
   Block,
   BlockMarker
 )
-from utils import Utils
+from support.pass_context import PassContext
+from support.scope_index import ScopeIndex
+
+BLOCK_MARKER_PATTERN = re.compile(BLOCK_MARKER_REGEX)
+BLOCK_MARKER_KEYWORDS = frozenset([KEYWORD_BLOCK, KEYWORD_BGN[0], KEYWORD_END[0], "{", "}"])
+BLOCK_KIND_TYPES = {
+  None: BlockType.GENERIC_BLOCK,
+  KEYWORD_LOOP: BlockType.LP_BLOCK,
+  KEYWORD_IF: BlockType.IF_BLOCK,
+  KEYWORD_FUNCTION: BlockType.FNC_BLOCK,
+  KEYWORD_DATA_STRUCT: BlockType.DS_BLOCK,
+  KEYWORD_PROGRAM: BlockType.PRG_BLOCK
+}
+BLOCK_TYPE_FEATURES = {
+  BlockType.GENERIC_BLOCK: SourceFeature.GENERIC_BLOCK,
+  BlockType.LP_BLOCK: SourceFeature.LP_BLOCK,
+  BlockType.IF_BLOCK: SourceFeature.IF_BLOCK,
+  BlockType.FNC_BLOCK: SourceFeature.FNC_BLOCK,
+  BlockType.DS_BLOCK: SourceFeature.DS_BLOCK,
+  BlockType.PRG_BLOCK: SourceFeature.PRG_BLOCK
+}
+BRANCH_KEYWORDS = frozenset([KEYWORD_CALL, KEYWORD_JUMP, KEYWORD_JUMP_RELATIVE])
 
 class BlocksMappingPass:
-  def __init__(self, input_file: str, source: List[str]):
-    self._raw_source = source
-    self._input_file = input_file
+  def __init__(self, context: PassContext):
+    self._context = context
+    self._input_file = context.input_file
+    self._source = context.source
 
-  def process(self) -> Tuple[List[str], List[Block]]:
-    self._processed_source = self._raw_source
+  def process(self) -> Tuple[List[Block], ScopeIndex, SourceFeature]:
+    self._features = SourceFeature.NONE
     self._detect_blocks()
     self._validate_blocks()
     self._blocks = self._generate_blocks()
+    self._scopes = ScopeIndex(self._blocks, len(self._source))
     self._check_block_nesting()
-    return self._processed_source, self._blocks
+    for block in self._blocks:
+      self._features |= BLOCK_TYPE_FEATURES[block.type]
+    return self._blocks, self._scopes, self._features
 
   def _check_block_nesting(self) -> None:
+    for block in self._blocks:
+      if (block.type == BlockType.IF_BLOCK or \
+          block.type == BlockType.GENERIC_BLOCK or \
+          block.type == BlockType.LP_BLOCK) and \
+         self._scopes.parent_block_id(block.id) == -1:
+        block_type = "if" if block.type == BlockType.IF_BLOCK else ("blk" if block.type == BlockType.GENERIC_BLOCK else "lp")
+        raise RuntimeError(f"{os.path.basename(self._input_file)} line " +
+                           f"{block.start + 1}: unexpected '{block_type}' block found")
+
     for block in self._blocks:
       if block.type == BlockType.FNC_BLOCK and \
-         Utils.find_parent_block_id(block.start - 1, self._blocks) != -1:
+         self._scopes.parent_block_id(block.id) != -1:
         raise RuntimeError(f"{os.path.basename(self._input_file)} line " +
                            f"{block.start + 1}: nested functions are not allowed")
 
@@ -40,60 +72,48 @@ class BlocksMappingPass:
     self._block_list = []
     self._block_type_list = []
 
-    for idx, line in enumerate(self._raw_source):
-      clear_line = Utils.extract_line_no_comments(line)
-      if re.match(BLOCK_HEADER_BLK_REGEX, clear_line) or \
-         re.match(BLOCK_HEADER_PRG_REGEX, clear_line) or \
-         re.match(BLOCK_HEADER_LP_REGEX, clear_line) or \
-         re.match(BLOCK_HEADER_IF_REGEX, clear_line) or \
-         re.match(BLOCK_HEADER_FN_REGEX, clear_line) or \
-         re.match(BLOCK_HEADER_DS_REGEX, clear_line):
-        self._processed_source[idx] = f"; {line}"
+    for idx in range(len(self._source)):
+      tokens = self._source.tokens(idx)
+      if len(tokens) == 0:
+        continue
+
+      # Supersets of the lines the alias, variable and function passes act on
+      if tokens[0].startswith(KEYWORD_ALIAS):
+        self._features |= SourceFeature.ALIAS
+      if KEYWORD_VAR in self._source.code(idx):
+        self._features |= SourceFeature.VARIABLE
+      if not BRANCH_KEYWORDS.isdisjoint(tokens):
+        self._features |= SourceFeature.BRANCH
+
+      # Block markers always start with one of the block keywords
+      if tokens[0] not in BLOCK_MARKER_KEYWORDS:
+        continue
+
+      match = BLOCK_MARKER_PATTERN.match(self._source.code(idx))
+      if match == None:
+        continue
+
+      if match.group("decl") != None:
         self._block_list.append(BlockMarker(idx, BlockMarkerType.BLOCK_DECL))
-        self._block_type_list.append(self._detect_block_type(clear_line, idx))
-      elif re.match(BGN_REGEX, clear_line):
-          tokens = Utils.split_tokens(clear_line)
-          if len(tokens) != 1:
-            raise RuntimeError(f"{os.path.basename(self._input_file)} line " +
-                               f"{idx + 1}: keyword '{KEYWORD_BGN[0]}' or "+
-                               f"'{KEYWORD_BGN[1]}' must be the only token in the line")
-          self._processed_source[idx] = f"; {line}"
-          self._block_list.append(BlockMarker(idx, BlockMarkerType.BLOCK_BGN))
-          self._block_type_list.append(self._detect_block_type(clear_line, idx))
-      elif re.match(END_REGEX, clear_line):
-        tokens = Utils.split_tokens(clear_line)
-        if len(tokens) != 1:
-          raise RuntimeError(f"{os.path.basename(self._input_file)} line " +
-                              f"{idx + 1}: keyword '{KEYWORD_END[0]}' or "+
-                              f"'{KEYWORD_END[1]}' must be the only token in the line")
-
-        self._processed_source[idx] = f"; {line}"
-        self._block_list.append(BlockMarker(idx, BlockMarkerType.BLOCK_END))
-        self._block_type_list.append(self._detect_block_type(clear_line, idx))
-
-  def _detect_block_type(self, line: str, idx: int) -> BlockType:
-    # This function assumes a clear line as input (no comments)
-    tokens = Utils.split_tokens(line)
-
-    if len(tokens) == 1:
-      return BlockType.GENERIC_BLOCK
-    elif len(tokens) == 2:
-      if tokens[1] == KEYWORD_LOOP:
-        return BlockType.LP_BLOCK
-      elif tokens[1] == KEYWORD_IF:
-        return BlockType.IF_BLOCK
-      elif tokens[1] == KEYWORD_FUNCTION:
-        return BlockType.FNC_BLOCK
-      elif tokens[1] == KEYWORD_DATA_STRUCT:
-        return BlockType.DS_BLOCK
-      elif tokens[1] == KEYWORD_PROGRAM:
-        return BlockType.PRG_BLOCK
+        self._block_type_list.append(self._detect_block_type(match, idx))
+      elif match.group("bgn") != None:
+        self._block_list.append(BlockMarker(idx, BlockMarkerType.BLOCK_BGN))
+        self._block_type_list.append(BlockType.GENERIC_BLOCK)
       else:
-        raise RuntimeError(f"{os.path.basename(self._input_file)} line " +
-                               f"{idx + 1}: invalid block type")
-    else:
+        self._block_list.append(BlockMarker(idx, BlockMarkerType.BLOCK_END))
+        self._block_type_list.append(BlockType.GENERIC_BLOCK)
+      self._source.comment_out(idx)
+
+  def _detect_block_type(self, match: re.Match, idx: int) -> BlockType:
+    if match.group("extra") != None:
+      raise RuntimeError(f"{os.path.basename(self._input_file)} line " +
+                         f"{idx + 1}: invalid block structure")
+
+    kind = match.group("kind")
+    if kind not in BLOCK_KIND_TYPES:
       raise RuntimeError(f"{os.path.basename(self._input_file)} line " +
-                               f"{idx + 1}: invalid block structure")
+                         f"{idx + 1}: invalid block type")
+    return BLOCK_KIND_TYPES[kind]
 
   def _validate_blocks(self) -> None:
     block_stack = []
@@ -111,7 +131,7 @@ class BlocksMappingPass:
                              f"{block.position + 1}: 'bgn' or '{{' expected")
             elif stack_value == 2:
               raise RuntimeError(f"{os.path.basename(self._input_file)} line " +
-                             f"{len(self._processed_source)}: 'blk' expected")
+                             f"{len(self._source)}: 'blk' expected")
           else:
             raise RuntimeError(f"{os.path.basename(self._input_file)} line " +
                                f"{block.position + 1}: unexpected 'end' or '}}'")
@@ -122,15 +142,15 @@ class BlocksMappingPass:
 
           if first_value != 2:
             raise RuntimeError(f"{os.path.basename(self._input_file)} line " +
-                             f"{len(self._processed_source)}: 'bgn' or '{{' expected")
+                             f"{len(self._source)}: 'bgn' or '{{' expected")
 
           if second_value != 1:
             raise RuntimeError(f"{os.path.basename(self._input_file)} line " +
-                             f"{len(self._processed_source)}: 'blk' expected")
+                             f"{len(self._source)}: 'blk' expected")
 
     if len(block_stack) != 0:
       raise RuntimeError(f"{os.path.basename(self._input_file)} line " +
-                               f"{len(self._processed_source)}: 'end' or '}}' expected")
+                               f"{len(self._source)}: 'end' or '}}' expected")
 
   def _generate_blocks(self) -> List[Block]:
     blocks = []
@@ -151,14 +171,4 @@ class BlocksMappingPass:
         new_block = Block(block_start, block_end, block_type, len(blocks))
         blocks.append(new_block)
 
-    for block in blocks:
-      if (block.type == BlockType.IF_BLOCK or \
-          block.type == BlockType.GENERIC_BLOCK or \
-          block.type == BlockType.LP_BLOCK) and \
-         (block.start == 0 or \
-         Utils.find_parent_block_id(block.start - 1, blocks) == -1):
-        block_type = "if" if block.type == BlockType.IF_BLOCK else ("blk" if block.type == BlockType.GENERIC_BLOCK else "lp")
-        raise RuntimeError(f"{os.path.basename(self._input_file)} line " +
-                           f"{block.start + 1}: unexpected '{block_type}' block found")
-
     return blocks
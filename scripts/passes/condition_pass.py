@@ -1,161 +1,160 @@
 import os
 from typing import List, Tuple
 
-from enums import BlockType
+from enums import (
+  BlockType,
+  ConditionalOperand
+)
 from constants import *
-from support.assembler_identifier import AssemblerIdentifier
 from support.function import Function
 from support.block import Block
-from support.condition import Condition
+from support.condition import (
+  Comparison,
+  Condition,
+  ConditionOperand,
+  LogicalCondition
+)
+from support.pass_context import PassContext
+from support.symbol_table import SymbolTable
 from utils import Utils
 
+# Written forms of the operators, mapped to the name kept in the tree
+COMPARISON_OPERATORS = {x: y[0] for y in [TOKEN_EQUAL,
+                                          TOKEN_NOT_EQUAL,
+                                          TOKEN_LESS_THAN,
+                                          TOKEN_LESS_THAN_EQ_TO,
+                                          TOKEN_GREATER_THAN,
+                                          TOKEN_GREATER_THAN_EQ_TO]
+                        for x in y if x in CONDITIONAL_OPERATORS}
+LOGICAL_OPERATOR_NAMES = {x: y[0] for y in [TOKEN_AND, TOKEN_OR] for x in y}
+REGISTERS = frozenset(TOKEN_REGISTER)
+
 class ConditionPass:
   def  __init__(self,
-                input_file: str,
-                source: List[str],
+                context: PassContext,
                 blocks: List[Block],
-                identifiers: List[AssemblerIdentifier],
+                identifiers: SymbolTable,
                 functions: List[Function]):
-    self._raw_source = source
-    self._input_file = input_file
+    self._context = context
+    self._input_file = context.input_file
+    self._source = context.source
     self._blocks = blocks
     self._identifiers = identifiers
+    # Aliases are resolved by now, only these names are left to operands
+    self._known_names = set([x.name for x in functions] + [x.label for x in functions]) | \
+                        set(x.name for y in blocks for x in y.variables)
 
   def process(self) -> None:
-      for block in self._blocks:
-        if block.type == BlockType.IF_BLOCK:
-          self._validate_condition_header(block)
-          self._parse_conditions(block)
-          print(f"If at line {block.start}")
-          for line in range(block.start, block.end):
-            clear_line = Utils.extract_line_no_comments(self._raw_source[line])
-            if len(clear_line) != 0:
-              print (f"\t{self._raw_source[line][:-1]}")
-
-  def _parse_conditions(self, block: Block) -> None:
-    conditions = []
+    for block in self._blocks:
+      if block.type == BlockType.IF_BLOCK:
+        lines = self._find_condition_lines(block)
+        block.set_condition(self._parse_condition_chain(lines))
+
+  def _find_condition_lines(self, block: Block) -> List[Tuple[int, List[str]]]:
+    # The '.cnd:' lines open the block, none may follow its first instruction
+    lines = []
+    in_body = False
     for line in range(block.start, block.end):
-      clear_line = Utils.extract_line_no_comments(self._raw_source[line]).strip()
-
-      if len(clear_line) != 0 and self._is_condition_line(clear_line):
-        tokens = Utils.split_tokens(clear_line)
-        conditional_operator_position = self._conditional_operator_positions(tokens)
-        left_operand = self._extract_left_operand(tokens, conditional_operator_position, line)
-        right_operand = self._extract_right_operand(tokens, conditional_operator_position, line)
-        logic_operator = self._extract_logical_operand(tokens)
-        conditions.append(Condition(left_operand,
-                                    right_operand,
-                                    tokens[conditional_operator_position],
-                                    logic_operator))
-
-    for cnd in conditions:
-      print (f"Conditional operator at {conditional_operator_position} ({cnd.bool_operand})")
-      print (f" left operand: {cnd.left_operand}")
-      print (f" right operand: {cnd.right_operand}")
-      print (f" logical operand: {cnd.logic_operand}")
-
-  def _extract_logical_operand(self, tokens: List[str]) -> int:
-    operand = ""
-    if tokens[-1] in LOGICAL_OPERATORS:
-      operand = tokens[-1]
-    return operand
-
-  def _extract_left_operand(self, tokens: List[str], cnd_op_pos: int, line: int) -> int:
-    if len(tokens) <= 1 or \
-       tokens[cnd_op_pos - 1] == KEYWORD_CND:
-      raise RuntimeError(f"{os.path.basename(self._input_file)} line " +
-                         f"{line + 1}: expected lhs operand in '{KEYWORD_CND}' statement")
+      tokens = self._source.tokens(line)
+      if len(tokens) == 0:
+        continue
 
-    operand = ""
-    for position in range(1, cnd_op_pos):
-        operand += f"{tokens[position]} "
-        if tokens[position] in LOGICAL_OPERATORS:
-          raise RuntimeError(f"{os.path.basename(self._input_file)} line " +
-                             f"{line + 1}: unexpected '{tokens[position]}' in '{KEYWORD_CND}' statement")
-
-    return operand[:-1]
+      if not tokens[0].startswith(KEYWORD_CND):
+        in_body = True
+      elif in_body:
+        raise RuntimeError(f"{os.path.basename(self._input_file)} line " +
+                           f"{line + 1}: unexpected '{KEYWORD_CND}' found")
+      else:
+        code = self._source.code(line)
+        lines.append((line, code[code.find(KEYWORD_CND) + len(KEYWORD_CND):].split()))
 
-  def _extract_right_operand(self, tokens: List[str], cnd_op_pos: int, line: int) -> int:
-    if cnd_op_pos + 1 >= len(tokens) or \
-       tokens[cnd_op_pos + 1] in LOGICAL_OPERATORS or \
-       tokens[cnd_op_pos - 1] == KEYWORD_CND:
+    if len(lines) == 0:
       raise RuntimeError(f"{os.path.basename(self._input_file)} line " +
-                         f"{line + 1}: expected rhs operand in '{KEYWORD_CND}' statement")
-
-    operand = ""
-    for position in range(cnd_op_pos + 1, len(tokens)):
-        if tokens[position] not in LOGICAL_OPERATORS:
-          operand += f"{tokens[position]} "
-        elif tokens[position] in LOGICAL_OPERATORS and \
-             position != len(tokens) -1:
+                         f"{block.start + 1}: '{KEYWORD_CND}' statement expected in blk '{KEYWORD_IF}'")
+    return lines
+
+  def _parse_condition_chain(self, lines: List[Tuple[int, List[str]]]) -> Condition:
+    # Every line but the last one ends with the operator joining it to the
+    # next line. 'and' binds tighter than 'or'.
+    comparisons = []
+    operators = []
+    for position, (line, tokens) in enumerate(lines):
+      last = position == len(lines) - 1
+      if len(tokens) != 0 and tokens[-1] in LOGICAL_OPERATOR_NAMES:
+        if last:
           raise RuntimeError(f"{os.path.basename(self._input_file)} line " +
-                             f"{line + 1}: unexpected '{tokens[position]}' in '{KEYWORD_CND}' statement")
-
-    return operand[:-1]
-
-  def _conditional_operator_positions(self, tokens: List[str]) -> int:
-    position = -1
-    for idx, token in enumerate(tokens):
-      if token in CONDITIONAL_OPERATORS:
-        position = idx
-        break
-
-    return position
-
-  def _validate_condition_header(self, block: Block) -> None:
-    in_condition_list = False
-    in_body = False
-    condition_counter = 0
-    first_condition_index = 0
+                             f"{line + 1}: unexpected '{tokens[-1]}' found")
+        operators.append(LOGICAL_OPERATOR_NAMES[tokens[-1]])
+        tokens = tokens[:-1]
+      elif not last:
+        raise RuntimeError(f"{os.path.basename(self._input_file)} line " +
+                           f"{line + 1}: expected 'and' or 'or' at the end of '{KEYWORD_CND}' statement")
+      comparisons.append(self._parse_comparison(tokens, line))
+
+    _, condition = self._parse_or(comparisons, operators, 0)
+    return condition
+
+  def _parse_or(self, comparisons: List[Comparison], operators: List[str], position: int) -> Tuple[int, Condition]:
+    # operators[n] joins comparisons[n] and comparisons[n + 1]
+    position, condition = self._parse_and(comparisons, operators, position)
+    while position < len(operators) and operators[position] == TOKEN_OR[0]:
+      position, right = self._parse_and(comparisons, operators, position + 1)
+      condition = LogicalCondition(TOKEN_OR[0], condition, right)
+    return position, condition
+
+  def _parse_and(self, comparisons: List[Comparison], operators: List[str], position: int) -> Tuple[int, Condition]:
+    condition = comparisons[position]
+    while position < len(operators) and operators[position] == TOKEN_AND[0]:
+      position += 1
+      condition = LogicalCondition(TOKEN_AND[0], condition, comparisons[position])
+    return position, condition
+
+  def _parse_comparison(self, tokens: List[str], line: int) -> Comparison:
+    operator_position = -1
+    for position, token in enumerate(tokens):
+      if token in LOGICAL_OPERATOR_NAMES or \
+         token in COMPARISON_OPERATORS and operator_position != -1:
+        raise RuntimeError(f"{os.path.basename(self._input_file)} line " +
+                           f"{line + 1}: unexpected '{token}' in '{KEYWORD_CND}' statement")
+      if token in COMPARISON_OPERATORS:
+        operator_position = position
 
-    for line in range(block.start, block.end):
-      clear_line = Utils.extract_line_no_comments(self._raw_source[line]).strip()
-      if len(clear_line) != 0:
-        if in_condition_list == False and in_body == False:
-          in_condition_list = self._is_condition_line(clear_line)
-          in_body = not self._is_condition_line(clear_line)
-
-          if in_condition_list == True:
-            first_condition_index = line
-        elif  in_condition_list == True and in_body == False:
-          condition_counter += 1
-          in_condition_list = self._is_condition_line(clear_line)
-          in_body = not self._is_condition_line(clear_line)
-        elif  in_condition_list == False and in_body == True:
-          if self._is_condition_line(clear_line):
-            raise RuntimeError(f"{os.path.basename(self._input_file)} line " +
-                               f"{line + 1}: unexpected '{KEYWORD_CND}' found")
-
-    self._validate_boolean_operators(block, condition_counter, first_condition_index)
-
-  def _validate_boolean_operators(self, block: Block, condition_counter:int, first: int) -> None:
-    if condition_counter == 0:
+    if operator_position == -1:
       raise RuntimeError(f"{os.path.basename(self._input_file)} line " +
-                          f"{block.start + 1}: '{KEYWORD_CND}' statement expected in blk '{KEYWORD_IF}'")
-
-    if condition_counter == 1:
-      clear_line = Utils.extract_line_no_comments(self._raw_source[first]).strip()
-      tokens = Utils.split_tokens(clear_line)
-
-      if tokens[-1] in LOGICAL_OPERATORS:
-        raise RuntimeError(f"{os.path.basename(self._input_file)} line " +
-                           f"{first + 1}: unexpected '{tokens[-1]}' found")
-    else:
-      for position in range(first, first + condition_counter):
-        clear_line = Utils.extract_line_no_comments(self._raw_source[position]).strip()
-        tokens = Utils.split_tokens(clear_line)
+                         f"{line + 1}: expected comparison operator in '{KEYWORD_CND}' statement")
+    if operator_position == 0:
+      raise RuntimeError(f"{os.path.basename(self._input_file)} line " +
+                         f"{line + 1}: expected lhs operand in '{KEYWORD_CND}' statement")
+    if operator_position == len(tokens) - 1:
+      raise RuntimeError(f"{os.path.basename(self._input_file)} line " +
+                         f"{line + 1}: expected rhs operand in '{KEYWORD_CND}' statement")
 
-        if tokens[-1] not in LOGICAL_OPERATORS and position < first + condition_counter - 1:
-          raise RuntimeError(f"{os.path.basename(self._input_file)} line " +
-                            f"{position + 1}: expected '{tokens[-1]}' found")
-        elif tokens[-1] in LOGICAL_OPERATORS and position == first + condition_counter - 1:
-          raise RuntimeError(f"{os.path.basename(self._input_file)} line " +
-                             f"{position + 1}: unexpected '{tokens[-1]}' found")
+    return Comparison(self._parse_operand(tokens[:operator_position], line),
+                      COMPARISON_OPERATORS[tokens[operator_position]],
+                      self._parse_operand(tokens[operator_position + 1:], line),
+                      line)
 
-  def _is_condition_line(self, line:str) -> bool:
-    tokens = Utils.split_tokens(line)
+  def _parse_operand(self, tokens: List[str], line: int) -> ConditionOperand:
+    text = " ".join(tokens)
+    if len(tokens) == 1 and text in REGISTERS:
+      return ConditionOperand(ConditionalOperand.REGISTER, text)
 
-    if KEYWORD_CND in tokens[0]:
-      return True
-    else:
-      return False
\ No newline at end of file
+    brackets = text.count('[') + text.count(']')
+    if brackets != 0 and (brackets != 2 or not text.startswith('[') or not text.endswith(']')):
+      raise RuntimeError(f"{os.path.basename(self._input_file)} line " +
+                         f"{line + 1}: invalid operand '{text}' in '{KEYWORD_CND}' statement")
+
+    self._validate_names(text.strip('[]').split(), line)
+    if brackets != 0:
+      return ConditionOperand(ConditionalOperand.MEMORY_ALIAS, text)
+    # Numbers, constants and expressions of them
+    return ConditionOperand(ConditionalOperand.NUMBER, text)
+
+  def _validate_names(self, tokens: List[str], line: int) -> None:
+    for token in tokens:
+      # '$' starts hexadecimal numbers as well as names
+      if token in REGISTERS or token.startswith('$') or not Utils.is_valid_identifier(token):
+        continue
+      if token not in self._identifiers and token not in self._known_names:
+        self._context.report(f"{os.path.basename(self._input_file)} line " +
+                             f"{line + 1}: Warning: Undeclared identifier '{token}'")
@@ -1,153 +1,141 @@
-import os
 import re
-from typing import List, Tuple
+from typing import Iterator, List, Optional, Tuple
 
 from constants import *
 from enums import IdentifierType
 from support.assembler_identifier import AssemblerIdentifier
+from support.include_cache import IncludeCache
+from support.include_directive import scan_include_directive
+from support.include_scan import IncludeScan
+from support.pass_context import PassContext
+from support.source_buffer import SourceBuffer
+from support.symbol_table import SymbolTable
 from utils import Utils
 
-class FindIncludesPass:
-  def __init__(self, input_file: str, source: List[str], include_path: List[str]):
-    self._input_file = input_file
-    self._raw_source = source
-    self._cmd_include_path = include_path
-    self._identifier_list = []
+MEMORY_ALIAS_PATTERN = re.compile(MEMORY_ALIAS_REGEX)
+MACRO_PATTERN = re.compile(MACRO_REGEX)
+LABEL_PATTERN = re.compile(LABEL_REGEX)
+# Lines of an include that may declare something, checked with the patterns
+# above once decoded. Whitespace excludes new lines to stay within a line.
+SCAN_CANDIDATE_PATTERN = re.compile(rb"^inc(?:lude|bin)|EQU|equ|:[^\S\n]*(?:macro|MACRO)|" +
+                                    rb"^[^\S\n]*[^\s:;]*[^\S\n]*:[^\S\n]*(?:;|$)", re.MULTILINE)
 
-  def process(self) -> Tuple[List[str], List[AssemblerIdentifier]]:
+class FindIncludesPass:
+  def __init__(self,
+               context: PassContext):
+    self._context = context
+    self._input_file = context.input_file
+    self._source = context.source
+    self._cmd_include_path = context.include_path
+    self._cache = context.cache
+    self._identifier_list = SymbolTable()
+
+  def process(self) -> Tuple[List[str], SymbolTable]:
     top_level_source = Utils.locate_file(self._input_file,
                                          self._cmd_include_path,
                                          self._input_file,
                                          1)
-    print(f"Top level include {top_level_source}")
     self._include_list = [top_level_source]
-
-    self._extract_includes(self._raw_source)
-    self._extract_memory_aliasses()
-    self._extract_macros()
-    self._extract_labels()
-
-    return [self._include_list, self._identifier_list]
-
-  def _extract_memory_aliasses(self) -> None:
-    for file in self._include_list:
-      source = Utils.load_file_source(file, self._cmd_include_path)
-      for idx, line in enumerate(source):
-        clear_line = Utils.extract_line_no_comments(line)
-
-        if re.match(MEMORY_ALIAS_REGEX, clear_line):
-          tokens = Utils.split_tokens(line)
-
-          if tokens[0].upper() == KEYWORD_DEF:
-            self._identifier_list.append(AssemblerIdentifier(tokens[1],
-                                                        file,
-                                                        idx,
-                                                        IdentifierType.NAMED_CONSTANT))
-          else:
-            self._identifier_list.append(AssemblerIdentifier(tokens[0],
-                                                        file,
-                                                        idx,
-                                                        IdentifierType.NAMED_CONSTANT))
-
-  def _extract_macros(self) -> None:
-    for file in self._include_list:
-      source = Utils.load_file_source(file, self._cmd_include_path)
-      for idx, line in enumerate(source):
-        clear_line = Utils.extract_line_no_comments(line)
-
-        if re.match(MACRO_REGEX, clear_line):
-          tokens = Utils.split_tokens(line)
-
-          if ':' in tokens[0]:
-            id = tokens[0].split(':')[0]
-            self._identifier_list.append(AssemblerIdentifier(id,
-                                                            file,
-                                                            idx,
-                                                            IdentifierType.MACRO))
-          else:
-            self._identifier_list.append(AssemblerIdentifier(tokens[0],
-                                                            file,
-                                                          idx,
-                                                          IdentifierType.MACRO))
-
-  def _extract_labels(self) -> None:
-    for file in self._include_list:
-      source = Utils.load_file_source(file, self._cmd_include_path)
-      for idx, line in enumerate(source):
-        clear_line = Utils.extract_line_no_comments(line)
-
-        if re.match(LABEL_REGEX, clear_line):
-          tokens = Utils.split_tokens(line)
-
-          id = tokens[0]
-          if ':' in id:
-            id = id.split(':')[0]
-          if '.' in id:
-            id = id.split('.')[1]
-
-          self._identifier_list.append(AssemblerIdentifier(id,
-                                                           file,
-                                                           idx,
-                                                           IdentifierType.LABEL))
-
-  def _extract_includes(self, source : List[str]) -> None:
-    local_includes = []
-    for idx, line in enumerate(source):
-      clear_line = Utils.extract_line_no_comments(line)
-
-      if re.match(INCLUDE_REGEX, clear_line):
-        include_path = self._extract_included_path(clear_line)
-        os_included_path = Utils.locate_file(include_path,
-                                             self._cmd_include_path,
-                                             self._input_file,
-                                             idx)
-
-        if not self._path_already_exist(os_included_path):
-          self._include_list.append(os_included_path)
-          local_includes.append(os_included_path)
-
-    self._extract_sub_includes(local_includes)
-
-  def _extract_sub_includes(self, input_local_includes: List[str]) -> None:
-    if len(input_local_includes) != 0:
-      local_includes = []
-      for include in input_local_includes:
-        source = Utils.load_file_source(include, self._cmd_include_path)
-
-        for idx, line in enumerate(source):
-          clear_line = Utils.extract_line_no_comments(line)
-
-          if re.match(INCLUDE_REGEX, clear_line):
-            include_path = self._extract_included_path(clear_line)
-            os_included_path = Utils.locate_file(include_path,
-                                                  self._cmd_include_path,
-                                                  self._input_file,
-                                                  idx)
-
-            if not self._path_already_exist(os_included_path):
-              self._include_list.append(os_included_path)
-              local_includes.append(os_included_path)
-
-      self._extract_sub_includes(local_includes)
-
-  def _path_already_exist(self, path: str) -> bool:
-    for include_path in self._include_list:
-      if (os.path.samefile(path, include_path)):
-        return True
-
-    return False
-
-  def _extract_included_path(self, clear_line: str) -> str:
-    include_path = ""
-    path_started = False
-    for char in clear_line:
-      if path_started == False and char == '\"':
-        path_started = True
-        continue
-      elif path_started == True and char == '\"':
+    self._binary_include_list = []
+    self._included_files = set([IncludeCache.identify(top_level_source)[0]])
+
+    # Breadth-first walk over the include tree, each file is scanned only once
+    top_level_lines = ((x, self._source.code(x), self._source.tokens(x))
+                       for x in range(len(self._source)))
+    scan = self._scan_source(top_level_source, top_level_lines)
+    position = 0
+    while True:
+      self._register_scan(self._include_list[position], scan)
+      position += 1
+      if position == len(self._include_list):
         break
+      scan = self.scan_include(self._include_list[position])
+
+    return [self._include_list + self._binary_include_list, self._identifier_list]
+
+  def scan_include(self, os_path: str) -> IncludeScan:
+    # Scan of an include through the cache, without walking its own includes
+    return self._cache.scan(os_path, self._scan_include_source)
+
+  def _register_scan(self, file: str, scan: IncludeScan) -> None:
+    for identifier in scan.identifiers:
+      self._identifier_list.add(identifier)
+
+    for include_path, idx in scan.includes:
+      os_included_path = Utils.locate_file(include_path,
+                                           self._cmd_include_path,
+                                           file,
+                                           idx)
+      key, _ = IncludeCache.identify(os_included_path)
+      if key not in self._included_files:
+        self._included_files.add(key)
+        self._include_list.append(os_included_path)
+
+    # Binary files are only reported as dependencies. A missing one is left
+    # to the assembler, it may be generated later in the build.
+    for include_path, _ in scan.binary_includes:
+      os_included_path = Utils.find_file(include_path, self._cmd_include_path)
+      if os_included_path == None:
+        continue
+      key, _ = IncludeCache.identify(os_included_path)
+      if key not in self._included_files:
+        self._included_files.add(key)
+        self._binary_include_list.append(os_included_path)
+
+  def _scan_include_source(self, file: str, source: SourceBuffer) -> IncludeScan:
+    return self._scan_source(file, self._find_candidate_lines(source))
+
+  def _find_candidate_lines(self, source: SourceBuffer) -> Iterator[Tuple[int, str, Optional[List[str]]]]:
+    # Only the lines matched in the mapped bytes are decoded
+    last_idx = -1
+    for match in SCAN_CANDIDATE_PATTERN.finditer(source.content):
+      idx = source.line_of_offset(match.start())
+      if idx != last_idx:
+        last_idx = idx
+        yield idx, Utils.extract_line_no_comments(source[idx]), None
+
+  def _scan_source(self, file: str, lines: Iterator[Tuple[int, str, Optional[List[str]]]]) -> IncludeScan:
+    includes = []
+    binary_includes = []
+    identifiers = []
+
+    for idx, clear_line, tokens in lines:
+      if len(clear_line) == 0:
+        continue
 
-      if path_started == True:
-        include_path += char
-
-    return include_path
+      directive = scan_include_directive(clear_line)
+      if directive != None:
+        if directive.is_binary:
+          binary_includes.append((directive.path, idx))
+        else:
+          includes.append((directive.path, idx))
+
+      if MEMORY_ALIAS_PATTERN.match(clear_line):
+        tokens = tokens if tokens != None else Utils.split_tokens(clear_line)
+        name = tokens[1] if tokens[0].upper() == KEYWORD_DEF.upper() else tokens[0]
+        identifiers.append(AssemblerIdentifier(name,
+                                               file,
+                                               idx,
+                                               IdentifierType.NAMED_CONSTANT))
+
+      if MACRO_PATTERN.match(clear_line):
+        tokens = tokens if tokens != None else Utils.split_tokens(clear_line)
+        identifiers.append(AssemblerIdentifier(tokens[0].split(':')[0],
+                                               file,
+                                               idx,
+                                               IdentifierType.MACRO))
+
+      if LABEL_PATTERN.match(clear_line):
+        tokens = tokens if tokens != None else Utils.split_tokens(clear_line)
+        id = tokens[0]
+        if ':' in id:
+          id = id.split(':')[0]
+        if '.' in id:
+          id = id.split('.')[1]
+
+        identifiers.append(AssemblerIdentifier(id,
+                                               file,
+                                               idx,
+                                               IdentifierType.LABEL))
+
+    return IncludeScan(includes, binary_includes, identifiers)
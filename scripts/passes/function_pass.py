@@ -1,29 +1,39 @@
 import os
 import re
-from typing import List, Tuple
+from typing import List
 
-from enums import BlockType
+from enums import (
+  BlockType,
+  SourceFeature
+)
 from support.function import Function
 from constants import *
 from support.block import (
   Block
 )
+from support.pass_context import PassContext
 from utils import Utils
 
 class FunctionPass:
-  def __init__(self, input_file: str, source: List[str], blocks: List[Block]):
-    self._raw_source = source
-    self._input_file = input_file
+  def __init__(self,
+               context: PassContext,
+               blocks: List[Block],
+               features: SourceFeature):
+    self._context = context
+    self._input_file = context.input_file
+    self._source = context.source
     self._blocks = blocks
+    self._features = features
 
-  def process(self) -> Tuple[List[Function], List[str]]:
-    self._processed_source = self._raw_source
+  def process(self) -> List[Function]:
     functions_blocks = self._find_functions()
     functions = self._process_function(functions_blocks)
     self._emit_function_body(functions)
-    self._correct_calls(functions)
+    self._branch_warnings = []
+    if self._features & SourceFeature.BRANCH:
+      self._process_branches(functions)
     self._issue_warnings(functions)
-    return functions, self._processed_source
+    return functions
 
   def _find_functions(self) -> List[Block]:
     return [x for x in self._blocks if x.type == BlockType.FNC_BLOCK]
@@ -44,7 +54,7 @@ class FunctionPass:
     function_body = False
 
     for line in range(blk.start, blk.end):
-      clear_line = Utils.extract_line_no_comments(self._raw_source[line])
+      clear_line = self._source.code(line)
 
       if re.match(NAME_REGEX, clear_line) and function_body == False:
         if name_found == False:
@@ -63,19 +73,19 @@ class FunctionPass:
   def _extract_function_name(self, blk: Block) -> str:
     name = ""
     for line in range(blk.start, blk.end):
-      clear_line = Utils.extract_line_no_comments(self._raw_source[line])
+      clear_line = self._source.code(line)
 
       if len(clear_line) == 0:
         continue
 
       if re.match(NAME_REGEX, clear_line):
-        tokens = Utils.split_tokens(clear_line)
+        tokens = self._source.tokens(line)
 
         if name != "":
           raise RuntimeError(f"{os.path.basename(self._input_file)} line " +
                                f"{line + 1}: unexpected keyword 'name' " +
                                f"in function '{name}'")
-        self._processed_source[line] = f"; {self._raw_source[line]}"
+        self._source.comment_out(line)
 
         if Utils.is_valid_identifier(tokens[1]) == False:
           raise RuntimeError(f"{os.path.basename(self._input_file)} line " +
@@ -90,38 +100,43 @@ class FunctionPass:
 
   def _emit_function_body(self, functions: List[Function]) -> None:
     for func in functions:
-      self._processed_source[func.block.start] =\
-        f"{func.label}: {self._processed_source[func.block.start]}"
+      self._source.add_label(func.block.start, f"{func.label}: ")
+
+  def _process_branches(self, functions: List[Function]) -> None:
+    # Calls and jumps take the target function as their last operand
+    functions_by_name = {}
+    for func in functions:
+      functions_by_name.setdefault(func.name, func)
+    if len(functions_by_name) == 0:
+      return
 
-  def _correct_calls(self, functions: List[Function]) -> None:
-    for idx, line in enumerate(self._processed_source):
-      clear_line = Utils.extract_line_no_comments(line)
-      tokens = Utils.split_tokens(clear_line)
+    for idx in range(len(self._source)):
+      tokens = self._source.tokens(idx)
+      if len(tokens) < 2 or tokens[-1] not in functions_by_name:
+        continue
+
+      func = functions_by_name[tokens[-1]]
       if KEYWORD_CALL in tokens:
-        for func in functions:
-          if func.name in tokens:
-            self._processed_source[idx] = line.replace(func.name, func.label)
+        line = self._source.content(idx)
+        code = line.code.rstrip()
+        self._source.replace_code(idx, code[:-len(func.name)] + func.label + line.code[len(code):])
+      elif KEYWORD_JUMP in tokens or \
+           KEYWORD_JUMP_RELATIVE in tokens:
+        self._branch_warnings.append(f"Warning: {os.path.basename(self._input_file)} line " +
+                                     f"{idx + 1}: branching to function '{func.name}' without using 'call'")
 
   def _issue_warnings(self, functions) -> None:
     for func in functions:
       has_return = False
       for line in range(func.block.start, func.block.end):
-        clear_line = Utils.extract_line_no_comments(self._raw_source[line])
-        tokens = Utils.split_tokens(clear_line)
+        tokens = self._source.tokens(line)
         if KEYWORD_RETURN in tokens or \
            KEYWORD_RETURN_I in tokens:
            has_return = True
 
       if has_return != True:
-         print(f"Warning: {os.path.basename(self._input_file)} line " +
-               f"{line + 1}: function '{func.name}' expected to have a return point ('ret'/'reti')")
-
-    for idx, line in enumerate(self._processed_source):
-      clear_line = Utils.extract_line_no_comments(line)
-      tokens = Utils.split_tokens(clear_line)
-      if KEYWORD_JUMP in tokens or \
-         KEYWORD_JUMP_RELATIVE in tokens:
-        for func in functions:
-          if func.name in tokens:
-            print(f"Warning: {os.path.basename(self._input_file)} line " +
-                  f"{idx + 1}: branching to function '{func.name}' without using 'call'")
+         self._context.report(f"Warning: {os.path.basename(self._input_file)} line " +
+                              f"{line + 1}: function '{func.name}' expected to have a return point ('ret'/'reti')")
+
+    for warning in self._branch_warnings:
+      self._context.report(warning)
@@ -0,0 +1,49 @@
+import importlib
+from typing import Optional
+
+from enums import SourceFeature
+
+class PassEntry:
+  # A pass is imported the first time it is loaded. Passes with a feature
+  # only run when block mapping found that construct in the source.
+  __slots__ = ("_name", "_module", "_feature")
+
+  def __init__(self, name: str, module: str, feature: Optional[SourceFeature] = None):
+    self._name = name
+    self._module = module
+    self._feature = feature
+
+  @property
+  def name(self) -> str:
+    return self._name
+
+  @property
+  def module(self) -> str:
+    return self._module
+
+  @property
+  def feature(self) -> Optional[SourceFeature]:
+    return self._feature
+
+  def is_needed(self, features: SourceFeature) -> bool:
+    return self._feature == None or bool(features & self._feature)
+
+  def load(self) -> type:
+    return getattr(importlib.import_module(self._module), self._name)
+
+PASS_REGISTRY = {x.name: x for x in [
+  PassEntry("FindIncludesPass", "passes.find_includes_pass"),
+  PassEntry("BlocksMappingPass", "passes.block_mapping_pass"),
+  PassEntry("ProgramPass", "passes.program_pass"),
+  PassEntry("FunctionPass", "passes.function_pass", feature=SourceFeature.FNC_BLOCK),
+  PassEntry("RegisterAliasPass", "passes.register_alias_pass"),
+  PassEntry("StructDeclarationPass", "passes.struct_declaration_pass", feature=SourceFeature.DS_BLOCK),
+  PassEntry("VariablesPass", "passes.variables_pass"),
+  PassEntry("ConditionPass", "passes.condition_pass", feature=SourceFeature.IF_BLOCK)
+]}
+
+def is_pass_needed(name: str, features: SourceFeature) -> bool:
+  return PASS_REGISTRY[name].is_needed(features)
+
+def load_pass(name: str) -> type:
+  return PASS_REGISTRY[name].load()
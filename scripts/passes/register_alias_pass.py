@@ -1,140 +1,147 @@
 import os
 import re
-import sys
-from typing import List
+from collections import ChainMap
+from typing import List, Set, Tuple
 
 from constants import *
-from enums import LabelOperation
+from enums import (
+  BlockType,
+  LabelOperation
+)
 from utils import Utils
 from support.alias import Alias
-from support.assembler_identifier import AssemblerIdentifier
 from support.block import (
   Block
 )
+from support.function import Function
+from support.pass_context import PassContext
+from support.symbol_table import SymbolTable
+from support.scope_index import ScopeIndex
+
+ALIAS_PATTERN = re.compile(ALIAS_REGEX)
+# Whole identifiers only, '.local' labels and 'var.attr' attributes excluded
+ALIAS_NAME_PATTERN = re.compile(r"(?<![\w.$])[a-zA-Z_$][\w$]*")
 
 class RegisterAliasPass:
   def __init__(self,
-               input_file: str,
-               source: List[str],
+               context: PassContext,
                blocks: List[Block],
-               identifiers: List[AssemblerIdentifier],
-               functions: List[Block]):
-    self._raw_source = source
-    self._input_file = input_file
+               scopes: ScopeIndex,
+               identifiers: SymbolTable,
+               functions: List[Function]):
+    self._context = context
+    self._input_file = context.input_file
+    self._source = context.source
     self._blocks = blocks
+    self._scopes = scopes
     self._identifiers = identifiers
     self._functions = functions
-
-  @property
-  def processed_source(self) -> List[str]:
-    return self._processed_source
+    self._function_names = set([x.name for x in functions] + [x.label for x in functions])
 
   def process(self) -> None:
     aliasses = self._locate_alias_operations()
 
     self._process_source(aliasses)
-    self._correct_remaining_aliases(aliasses)
-
-    return self._processed_source
 
   def _locate_alias_operations(self) -> List[Alias]:
     aliasses = []
-    for idx, line in enumerate(self._raw_source):
-      clear_line = Utils.extract_line_no_comments(line)
+    scoped_names = set()
+    for idx in range(len(self._source)):
+      clear_line = self._source.code(idx)
 
-      if re.match(ALIAS_REGEX, clear_line):
-        self._raw_source[idx] = f"; {line}"
+      if ALIAS_PATTERN.match(clear_line):
+        self._source.comment_out(idx)
 
         proper_command = re.split(KEYWORD_ALIAS, clear_line)[1]
         target_alias = re.split(',', proper_command)[1].strip()
         target_register = re.split(',', proper_command)[0].strip()
-        parent_block_id = Utils.find_parent_block_id(idx, self._blocks)
+        parent_block_id = self._scopes.innermost_block_id(idx)
 
         if not Utils.is_valid_identifier(target_alias):
           raise RuntimeError(f"{os.path.basename(self._input_file)} line " +
                               f"{idx + 1}: Invalid identifier '{target_alias}' " +
                               f"detected")
 
-        if not Utils.is_identifier_unique(self._identifiers, target_alias):
-          identifier = [x for x in self._identifiers if x.identifier_name == target_alias][0]
+        if target_alias in self._identifiers:
+          identifier = self._identifiers.get(target_alias)
           raise RuntimeError(f"{os.path.basename(self._input_file)} line " +
                               f"{idx + 1}: identifier '{target_alias}' " +
                               f"already defined in {identifier.file_name}, line {identifier.line + 1}")
 
-        for alias in [x for x in aliasses if x.parent_block_id == parent_block_id]:
-          if alias.name == target_alias:
-            raise RuntimeError(f"{os.path.basename(self._input_file)} line " +
-                               f"{idx + 1}: alias '{target_alias}' " +
-                                "has already been defined in this scope")
+        if (parent_block_id, target_alias) in scoped_names:
+          raise RuntimeError(f"{os.path.basename(self._input_file)} line " +
+                             f"{idx + 1}: alias '{target_alias}' " +
+                              "has already been defined in this scope")
 
         if parent_block_id == -1:
           raise RuntimeError(f"{os.path.basename(self._input_file)} line " +
                               f"{idx + 1}: Aliasses must be declared inside of 'blk' scopes")
 
+        scoped_names.add((parent_block_id, target_alias))
         aliasses.append(Alias(idx, target_alias,
                               target_register,
                               LabelOperation.DEF_LABEL, parent_block_id))
     return aliasses
 
-  def _find_decendent_blocks(self, line_number: int) -> List[Block]:
-    blocks = []
-    for block in self._blocks:
-      if line_number >= block.start and line_number <= block.end:
-        blocks.append(block)
-
-    return blocks
-
   def _process_source(self, aliasses: List[Alias]) -> None:
-    self._processed_source = []
-    names = [x.name for x in aliasses]
-    for idx, line in enumerate(self._raw_source):
-      clear_line = Utils.extract_line_no_comments(line)
-      split_line = Utils.split_tokens(clear_line)
-
-      for line_token in split_line:
-        if line_token not in KEYWORDS and Utils.is_valid_identifier(line_token) and \
-           not Utils.is_assembler_identifier(self._identifiers, line_token) and \
-           line_token not in names and line_token not in self._functions:
-            print (f"{os.path.basename(self._input_file)} line " +
-                   f"{idx + 1}: Warning: Undeclared identifier '{line_token}'")
-
-      line_text = line
-      for line_token in split_line:
-        for target_alias in [x for x in aliasses]:
-          if re.search(r"\b" + (target_alias.name) + r"\b" , line_token):
-            if target_alias.position > idx:
-              raise RuntimeError(f"{os.path.basename(self._input_file)} line " +
-                                f"{idx + 1}: Undeclared alias '{target_alias.name}'")
-            line_text = line.replace(target_alias.name, target_alias.register)
-            break
-
-      self._processed_source.append(line_text)
-
-  def _correct_remaining_aliases(self, aliasses: List[Alias]) -> None:
-    for idx, line in enumerate(self._processed_source):
-      clear_line = Utils.extract_line_no_comments(line)
-      for target_alias in aliasses:
-        if re.search(r"\b" + (target_alias.name) + r"\b" , clear_line):
-          decendent = [x.id for x in self._find_decendent_blocks(idx)]
-          allowed_aliases = []
-          for alias in aliasses:
-            if idx >= alias.position and \
-                alias.parent_block_id in decendent and \
-                alias.name == target_alias.name:
-                allowed_aliases.append(alias)
-
-          if len(allowed_aliases) == 0:
-            raise RuntimeError(f"{os.path.basename(self._input_file)} line " +
-                            f"{idx + 1}: Undeclared alias '{target_alias.name}'")
-          else:
-            candidate_alias = [x for x in allowed_aliases if x.name == target_alias.name]
-            closest_index = -1
-            min_diff = sys.maxsize
-            for alias_index, alias in enumerate(candidate_alias):
-              diff = abs(idx - alias.position)
-              if min_diff >= diff:
-                min_diff = diff
-                closest_index = alias_index
-
-            line_text = line.replace(target_alias.name, candidate_alias[closest_index].register)
-            self._processed_source[idx] = line_text
+    declarations = {x.position: x for x in aliasses}
+    alias_names = set(x.name for x in aliasses)
+    known_names = alias_names | self._function_names
+
+    # Stack of open scopes, each one sees its own aliases and its parents'
+    scope_stack = [(-1, ChainMap())]
+    for idx in range(len(self._source)):
+      block_id = self._scopes.innermost_block_id(idx)
+      if block_id != scope_stack[-1][0]:
+        self._enter_scope(scope_stack, block_id)
+
+      visible_aliases = scope_stack[-1][1]
+      if idx in declarations:
+        alias = declarations[idx]
+        visible_aliases.maps[0][alias.name] = alias
+        continue
+
+      line = self._source.line(idx)
+      for line_token in self._tokens_to_check(line.tokens, idx):
+        if line_token not in known_names and \
+           line_token not in self._identifiers and \
+           Utils.is_valid_identifier(line_token):
+            self._context.report(f"{os.path.basename(self._input_file)} line " +
+                                 f"{idx + 1}: Warning: Undeclared identifier '{line_token}'")
+
+      if len(alias_names) != 0 and len(line.code) != 0:
+        code = ALIAS_NAME_PATTERN.sub(lambda x: self._resolve_alias(x.group(0), visible_aliases, alias_names, idx),
+                                      self._source.content(idx).code)
+        self._source.replace_code(idx, code)
+
+  def _tokens_to_check(self, tokens: List[str], idx: int) -> List[str]:
+    # Operands of the conditions of 'blk if' are checked by ConditionPass
+    if len(tokens) != 0 and tokens[0].startswith(KEYWORD_CND):
+      block = self._scopes.innermost_block(idx)
+      if block != None and block.type == BlockType.IF_BLOCK:
+        return []
+    return tokens
+
+  def _enter_scope(self, scope_stack: List[Tuple[int, ChainMap]], block_id: int) -> None:
+    # Closes the scopes that do not enclose 'block_id' and opens the ones
+    # between the innermost remaining scope and 'block_id'
+    open_ids = [x[0] for x in scope_stack]
+    path = []
+    ancestor = block_id
+    while ancestor not in open_ids:
+      path.append(ancestor)
+      ancestor = self._scopes.parent_block_id(ancestor)
+
+    while scope_stack[-1][0] != ancestor:
+      scope_stack.pop()
+    for scope_id in reversed(path):
+      scope_stack.append((scope_id, scope_stack[-1][1].new_child()))
+
+  def _resolve_alias(self, name: str, visible_aliases: ChainMap, alias_names: Set[str], idx: int) -> str:
+    alias = visible_aliases.get(name)
+    if alias != None:
+      return alias.register
+    elif name in alias_names:
+      raise RuntimeError(f"{os.path.basename(self._input_file)} line " +
+                         f"{idx + 1}: Undeclared alias '{name}'")
+    return name
@@ -4,7 +4,6 @@ from typing import List, Tuple
 
 from enums import BlockType
 from constants import *
-from support.assembler_identifier import AssemblerIdentifier
 from support.block import Block
 from support.data_structure import (
   DataStructure,
@@ -12,27 +11,29 @@ from support.data_structure import (
   convert_type_to_size
 )
 from support.function import Function
+from support.pass_context import PassContext
+from support.struct_layout import StructRegistry
+from support.symbol_table import SymbolTable
 from utils import Utils
 
 class StructDeclarationPass:
   def  __init__(self,
-                input_file: str,
-                source: List[str],
+                context: PassContext,
                 blocks: List[Block],
-                identifiers: List[AssemblerIdentifier],
+                identifiers: SymbolTable,
                 functions: List[Function]):
-    self._raw_source = source
-    self._input_file = input_file
+    self._context = context
+    self._input_file = context.input_file
+    self._source = context.source
     self._blocks = blocks
     self._identifiers = identifiers
     self._functions = functions
 
-  def process(self) -> Tuple[List[DataStructure], List[str]]:
-    self._processed_source = self._raw_source
+  def process(self) -> StructRegistry:
     data_structure_blocks = self._find_data_structure_blocks()
     data_structures, name_lines = self._parse_data_structure_name(data_structure_blocks)
     data_structures = self._parse_data_structure_fields(data_structures, name_lines, data_structure_blocks)
-    return data_structures, self._processed_source
+    return StructRegistry(data_structures)
 
   def _find_data_structure_blocks(self):
     return [x for x in self._blocks if x.type == BlockType.DS_BLOCK]
@@ -40,13 +41,11 @@ class StructDeclarationPass:
   def _parse_data_structure_fields(self, data_structures: List[DataStructure], lines: List[int], blocks: List[Block]) -> List[DataStructure]:
     for idx, block in enumerate(blocks):
       offset = 0
-      print(lines)
       for line in range(lines[idx] + 1, block.end):
-        clear_line = Utils.extract_line_no_comments(self._raw_source[line])
+        clear_line = self._source.code(line)
 
         if re.match(ATTRIBUTE_DECLARATION_REGEX, clear_line):
-          clear_line = clear_line.replace(',', ' ')
-          tokens = Utils.split_tokens(clear_line)
+          tokens = self._source.line(line).operand_tokens
 
           type = convert_str_to_enum(tokens[2], line, self._input_file)
 
@@ -57,7 +56,7 @@ class StructDeclarationPass:
           data_structures[idx].register_attribute(tokens[1], type, offset, self._input_file, line)
           offset += convert_type_to_size(type)
 
-          self._processed_source[line] = f";{self._processed_source[line]}"
+          self._source.comment_out(line, ";")
         elif re.match(r"\b" + KEYWORD_ATTRIBUTE + r"\b", clear_line):
           raise RuntimeError(f"{os.path.basename(self._input_file)} line " +
                                f"{line + 1}: invalid attribute declaration")
@@ -68,22 +67,21 @@ class StructDeclarationPass:
   def _parse_data_structure_name(self, data_structures: List[Block]) -> Tuple[List[DataStructure], List[int]]:
     ds = []
     positions = []
+    data_structure_names = set()
+    function_names = set(x.name for x in self._functions)
     for block in data_structures:
       for line in range(block.start, block.end):
-        clear_line = Utils.extract_line_no_comments(self._raw_source[line])
+        clear_line = self._source.code(line)
 
         if len(clear_line) != 0:
           # Expect DS name sa first valid line in the block
           if re.match(NAME_REGEX, clear_line):
-            tokens = Utils.split_tokens(clear_line)
+            tokens = self._source.tokens(line)
 
-            data_structure_names = [x.name for x in ds]
-            assembly_names = [x.identifier_name for x in self._identifiers]
-            function_names = [x.name for x in self._functions]
             if tokens[1] in data_structure_names:
               raise RuntimeError(f"{os.path.basename(self._input_file)} line " +
                                  f"{line + 1}: multiple definitions of data structure '{tokens[1]}'")
-            if tokens[1] in assembly_names:
+            if tokens[1] in self._identifiers:
               raise RuntimeError(f"{os.path.basename(self._input_file)} line " +
                                  f"{line + 1}: multiple definitions of identifier '{tokens[1]}'")
             if tokens[1] in function_names:
@@ -93,9 +91,10 @@ class StructDeclarationPass:
               raise RuntimeError(f"{os.path.basename(self._input_file)} line " +
                                  f"{line + 1}: invalid data structure identifier '{tokens[1]}'")
 
+            data_structure_names.add(tokens[1])
             ds.append(DataStructure(tokens[1]))
             positions.append(line)
-            self._processed_source[line] = f";{self._processed_source[line]}"
+            self._source.comment_out(line, ";")
             break
           elif re.match(r"\b" + KEYWORD_NAME + r"\b", clear_line):
             raise RuntimeError(f"{os.path.basename(self._input_file)} line " +
@@ -1,79 +1,86 @@
 import os
 import re
-from typing import List, Tuple
+from typing import List
 
 from constants import *
 from enums import *
-from support.assembler_identifier import AssemblerIdentifier
-from support.block import (
-  get_stack_allocation_size,
-  get_heap_allocation_size,
-  Block,
-)
-from passes.struct_declaration_pass import DataStructure
+from support.block import Block
+from support.pass_context import PassContext
+from support.symbol_table import SymbolTable
+from support.scope_index import ScopeIndex
+from support.struct_layout import StructRegistry
 from support.variable import Variable
 from support.variable_storage import VariableStorage
 from support.operand import Operand
 from utils import Utils
 
+VARIABLE_DEFINITION_PATTERN = re.compile(VARIABLE_DEFINITION_REGEX)
+VARIABLE_KEYWORD_PATTERN = re.compile(r"\b" + KEYWORD_VAR + r"\b")
+
 class VariablesPass:
   def __init__(self,
-               input_file: str,
-               source: List[str],
+               context: PassContext,
                blocks: List[Block],
-               structs: List[DataStructure],
-               identifiers: List[AssemblerIdentifier]):
-    self._raw_source = source
-    self._input_file = input_file
+               scopes: ScopeIndex,
+               structs: StructRegistry,
+               identifiers: SymbolTable,
+               features: SourceFeature):
+    self._context = context
+    self._input_file = context.input_file
+    self._source = context.source
     self._blocks = blocks
+    self._scopes = scopes
     self._identifiers = identifiers
     self._structs = structs
+    self._features = features
 
 
-  def process(self) -> Tuple[List[str], List[Block]]:
-    self._processed_source = self._raw_source
-    self._raw_source.append('\n\n; Stack Allocation Map')
+  def process(self) -> None:
+    self._source.append('\n\n; Stack Allocation Map')
     func_or_prg_blocks = [x for x in self._blocks if (x.type == BlockType.FNC_BLOCK or x.type == BlockType.PRG_BLOCK)]
     for block in func_or_prg_blocks:
-      self._map_variables_per_block(block)
-      stack_allocation = get_stack_allocation_size(block.variables, self._structs, block.start, self._input_file);
+      # Allocation code and maps are emitted for blocks without variables too
+      if self._features & SourceFeature.VARIABLE:
+        self._map_variables_per_block(block)
+      stack_allocation = block.stack_allocation_size
       self._insert_stack_allocation_code(block, stack_allocation)
       self._insert_stack_deallocation_code(block, stack_allocation)
       self._generate_allocation_map_comment(block)
       self._process_variable_usage(block)
-    return self._processed_source, self._blocks
 
   def _generate_allocation_map_comment(self, block: Block) -> None:
     map_string = "\n"
     map_string += f"; {block.type.value}: id {str(hex(block.id))}\n"
-    map_string += f"; stack allocation: {get_stack_allocation_size(block.variables, self._structs, 0, self._input_file)}\n"
+    map_string += f"; stack allocation: {block.stack_allocation_size}\n"
     stack_offset = 0
     for var in block.stack_allocation_map:
       map_string += f";  @Stack + {var.offset}: {var.variable.name} ({var.variable.type}: {var.size})\n"
       stack_offset += var.size
     map_string += f";  @Stack_end: (@Stack + {stack_offset})\n"
-    map_string += f"; heap allocation: {get_heap_allocation_size(block.variables, self._structs, 0, self._input_file)}\n"
+    map_string += f"; heap allocation: {block.heap_allocation_size}\n"
     for var in block.heap_allocation_map:
       map_string += f";  @Heap:{var.address}: {var.variable.name} ({var.variable.type}: {var.size})\n"
 
-    self._raw_source.append(map_string)
+    self._source.append(map_string)
 
   def _process_variable_usage(self, block: Block) -> None:
-    variable_names = [x.name for x in block.variables]
+    if len(block.variables) == 0:
+      return
+
+    # One matcher per block over the whole names of its variables
+    names = sorted((re.escape(x.name) for x in block.variables), key=len, reverse=True)
+    variable_pattern = re.compile(r"(?<![\w.$])(?:" + "|".join(names) + r")(?![\w$])")
     for line in range(block.start, block.end):
-      clear_line = Utils.extract_line_no_comments(self._processed_source[line])
-      for variable in variable_names:
-        if re.search(variable + r"(\.|\,)?", clear_line) != None:
-          if variable in [x.name for x in block.variables]:
-            self._process_line_variable_usage(clear_line, block, line)
+      clear_line = self._source.code(line)
+      if variable_pattern.search(clear_line) != None:
+        self._process_line_variable_usage(clear_line, block, line)
 
   def _process_line_variable_usage(self, clear_line: str, block: Block, line: int) -> None:
-    tokens = Utils.split_tokens(clear_line.replace(',', ' '))
+    tokens = self._source.line(line).operand_tokens
 
     # Instructions
     if tokens[0] in INSTRUCTIONS:
       if len(tokens) == 3:
-        print (f"Instruction{clear_line}")
         self._process_variable_in_two_operand_instruction(tokens, block, line)
       elif len(tokens) == 2:
         self._process_variable_in_one_operand_instruction(tokens, block, line)
@@ -83,67 +90,21 @@ class VariablesPass:
      # High-level constructs
 
   def _process_variable_in_one_operand_instruction(self, tokens: List[str], block: Block, line: int) -> None:
-    operand = Operand(tokens[1], block, line, self._input_file)
+    operand = Operand(tokens[1], block, self._structs, line, self._input_file)
 
   def _process_variable_in_two_operand_instruction(self, tokens: List[str], block: Block, line: int) -> None:
-    left_operand = Operand(tokens[1], block, line, self._input_file)
-    right_operand = Operand(tokens[2], block, line, self._input_file)
-
-    if left_operand.operand_type == OperandType.VARIABLE_OPERAND:
-      if right_operand.operand_type == OperandType.REGISTER_OPERAND and \
-         tokens[0] in LD_INSTRUCTIONS:
-          if right_operand.operand_name not in TOKEN_REGISTER_A:
-            # instruction format: ld[i] <variable>, <register>
-            print(f"\tld [__tmp__], a")
-            print(f"\tld a, {right_operand.operand_name}")
-            print(f"\t{tokens[0]} [{left_operand.operand_name}], a")
-            print(f"\tld a, [__tmp__]")
-          else:
-             # instruction format: ld[i] <variable>, a
-            print(f"\t{tokens[0]} [{left_operand.operand_name}], a")
-      elif right_operand.operand_type == OperandType.REGISTER_OPERAND and \
-           tokens[0] not in LD_INSTRUCTIONS:
-          if right_operand.operand_name not in TOKEN_REGISTER_A:
-            # instruction format: add, sub ... <variable>, <register (not a)>
-            print(f"\tld [__tmp__], a")
-            print(f"\tld a, [{left_operand.operand_name}]")
-            print(f"\t{tokens[0]} a, {right_operand.operand_name}")
-            print(f"\tld [{left_operand.operand_name}], a")
-            print(f"\tld a, [__tmp__]")
-          else:
-            # instruction format: add, sub ... <variable>, a
-            print(f"\tld [__tmp__], a")
-            print(f"\tld [__tmp_2__], b")
-            print(f"\tld b, a")
-            print(f"\tld a, [{left_operand.operand_name}]")
-            print(f"\t{tokens[0]} a, b")
-            print(f"\tld [{left_operand.operand_name}], a")
-            print(f"\tld b, [__tmp_2__]")
-            print(f"\tld a, [__tmp__]")
-      elif right_operand.operand_type == OperandType.LITERAL_OPERAND:
-          if tokens[0] not in LD_INSTRUCTIONS:
-            # instruction format: add, sub ... <variable>, $literal$
-            print(f"\tld [__tmp__], a")
-            print(f"\tld a, [{left_operand.operand_name}]")
-            print(f"\t{tokens[0]} a, {right_operand.operand_name}")
-            print(f"\tld [{left_operand.operand_name}], a")
-            print(f"\tld a, [__tmp__]")
-          else:
-            # instruction format: ld[i] <variable>, $literal$
-            print(f"\tld [__tmp__], a")
-            print(f"\tld a, {right_operand.operand_name}")
-            print(f"\t{tokens[0]} [{left_operand.operand_name}], a")
-            print(f"\tld a, [__tmp__]")
+    left_operand = Operand(tokens[1], block, self._structs, line, self._input_file)
+    right_operand = Operand(tokens[2], block, self._structs, line, self._input_file)
 
   def _insert_stack_allocation_code(self, block: Block, allocation: int) -> None:
     if allocation != 0:
       for line in range(block.start, block.end):
-        tokens = Utils.split_tokens(self._processed_source[line])
+        tokens = self._source.line(line).text_tokens
         if (KEYWORD_BGN[0] in tokens or \
             KEYWORD_BGN[1] in tokens) and \
-           Utils.find_parent_block_id(line, self._blocks) == block.id:
-          alignment = Utils.get_alignment(self._raw_source[block.start])
-          self._processed_source[line] += f"{alignment}add sp, {allocation}\n"
+           self._scopes.innermost_block_id(line) == block.id:
+          alignment = Utils.get_alignment(self._source[block.start])
+          self._source.insert_after(line, f"{alignment}add sp, {allocation}\n")
           return
 
       raise RuntimeError(f"{os.path.basename(self._input_file)} line " +
@@ -152,36 +113,34 @@ class VariablesPass:
   def _insert_stack_deallocation_code(self, block: Block, allocation: int) -> None:
     if allocation != 0:
       # add dealocation to the end of the block
-      tokens = Utils.split_tokens(self._processed_source[block.end])
+      tokens = self._source.line(block.end).text_tokens
       if (KEYWORD_END[0] in tokens or \
           KEYWORD_END[1] in tokens) and \
-          Utils.find_parent_block_id(block.end, self._blocks) == block.id:
-        alignment = Utils.get_alignment(self._raw_source[block.end - 1])
-        self._processed_source[block.end] = f"{alignment}sub sp, {allocation}\n{self._processed_source[block.end]}"
+          self._scopes.innermost_block_id(block.end) == block.id:
+        alignment = Utils.get_alignment(self._source[block.end - 1])
+        self._source.insert_before(block.end, f"{alignment}sub sp, {allocation}\n")
       else:
         raise RuntimeError(f"{os.path.basename(self._input_file)} line " +
                            f"{block.start + 1}: expected keyword '{KEYWORD_END[0]}' or '{KEYWORD_END[1]}'")
 
     for line in range(block.start, block.end):
-      tokens = Utils.split_tokens(self._processed_source[line])
+      tokens = self._source.line(line).text_tokens
       if (KEYWORD_RETURN in tokens or KEYWORD_RETURN_I in tokens):
-        alignment = Utils.get_alignment(self._raw_source[line])
-        self._processed_source[line] = f"{alignment}sub sp, {allocation}\n{self._processed_source[line]}"
+        alignment = Utils.get_alignment(self._source[line])
+        self._source.insert_before(line, f"{alignment}sub sp, {allocation}\n")
 
   def _map_variables_per_block(self, block: Block) -> None:
     for line in range(block.start, block.end):
-        clear_line = Utils.extract_line_no_comments(self._processed_source[line])
-        if re.match(VARIABLE_DEFINITION_REGEX, clear_line):
-
-          clear_line = clear_line.replace(',', ' ')
-          tokens = Utils.split_tokens(clear_line)
+        clear_line = self._source.code(line)
+        if VARIABLE_DEFINITION_PATTERN.match(clear_line):
+          tokens = self._source.line(line).operand_tokens
 
           variable = self._construct_variable_object(tokens, line)
           block.register_variable(variable, self._structs, line, self._input_file)
 
-          self._processed_source[line] = f";{self._processed_source[line]}"
+          self._source.comment_out(line, ";")
 
-        elif re.search(r"\b" + KEYWORD_VAR + r"\b", clear_line):
+        elif VARIABLE_KEYWORD_PATTERN.search(clear_line):
           raise RuntimeError(f"{os.path.basename(self._input_file)} line " +
                                f"{line + 1}: invalid variable definition")
 
@@ -204,8 +163,7 @@ class VariablesPass:
       raise RuntimeError(f"{os.path.basename(self._input_file)} line " +
                          f"{line + 1}: invalid variable identifier '{tokens[1]}'")
     type = tokens[2]
-    struct_type_names = [x.name for x in self._structs]
-    if type not in VARIABLE_BASIC_TYPES and type not in struct_type_names:
+    if type not in VARIABLE_BASIC_TYPES and type not in self._structs:
       raise RuntimeError(f"{os.path.basename(self._input_file)} line " +
                          f"{line + 1}: invalid variable type '{tokens[2]}'")
 
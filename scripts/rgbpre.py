@@ -1,72 +1,197 @@
 #!/usr/bin/env python3
 
-from multiprocessing import Condition
+import io
 import os
+import sys
 import argparse
 from typing import List
 
 # Custom imports
-from passes.block_mapping_pass import BlocksMappingPass
-from passes.condition_pass import ConditionPass
-from passes.find_includes_pass import FindIncludesPass
-from passes.function_pass import FunctionPass
-from passes.program_pass import ProgramPass
-from passes.register_alias_pass import RegisterAliasPass
-from passes.struct_declaration_pass import StructDeclarationPass
-from passes.variables_pass import VariablesPass
-from utils import Utils
+from enums import SourceFeature
+from passes.pass_registry import (
+  is_pass_needed,
+  load_pass
+)
+from support.include_cache import IncludeCache
+from support.pass_context import PassContext
+from support.profiler import PassProfiler
+from support.struct_layout import StructRegistry
 
 # sys.tracebacklimit = 0
 
 def main():
   parser = argparse.ArgumentParser(description='rgb pre-processor')
   parser.add_argument('-i', '--input', type=str,
-                      help='Input file name', nargs=1)
+                      help='Input file name(s)', nargs='+')
   parser.add_argument('-o', '--output', type=str,
-                      help='Output file name', nargs=1)
+                      help='Output file name, or output directory when processing several inputs', nargs=1)
+  parser.add_argument('--manifest', type=str,
+                      help="File listing one 'input [output]' pair per line")
+  parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count(),
+                      help='Number of worker processes when processing several inputs')
   parser.add_argument('-I', '--include', type=str,
                       help='Include directory', nargs="*")
+  parser.add_argument('--cache-dir', type=str,
+                      help='Directory of the persistent include identifier index, $XDG_CACHE_HOME/rgbpre by default')
+  parser.add_argument('--no-cache', action='store_true',
+                      help='Do not use the persistent include identifier index')
+  parser.add_argument('--serve', type=str, metavar='SOCKET', nargs='?', const="",
+                      help='Run as a resident server listening on a Unix socket, $RGBPRE_SOCKET by default')
+  parser.add_argument('--watch', action='store_true',
+                      help='Keep running and re-process the input whenever it or one of its includes changes')
+  parser.add_argument('--watch-interval', type=float, default=0.5,
+                      help='Polling interval of --watch in seconds')
+  parser.add_argument('--profile', action='store_true',
+                      help='Report time, line visits, line rewrites and regex evaluations of every pass')
+  parser.add_argument('--profile-json', type=str, metavar='FILE',
+                      help='Write the --profile report as JSON to FILE')
+  parser.add_argument('--profile-pstats', type=str, metavar='FILE',
+                      help='Dump the cProfile statistics of the passes to FILE')
   args = parser.parse_args()
 
+  cache = IncludeCache(None if args.no_cache else load_identifier_index(args.cache_dir))
+  if args.serve != None:
+    # The client and the server are only needed in server mode
+    from rgbpre_client import get_default_socket_path
+    from server import serve
+    serve(args.serve if args.serve != "" else get_default_socket_path(), cache)
+    return
+
   # Acquire arguments
-  input_path = args.input[0]
-  output_path = args.output[0]
-  include_path = args.include
-  if include_path == None:
-    include_path = []
-  include_path.append(os.getcwd())
-  include_path = list(set(include_path))
+  include_path = get_include_path(args.include, os.getcwd())
+  output_path = args.output[0] if args.output != None else None
+  if args.input == None and args.manifest == None:
+    parser.error('an input file or a manifest is required')
+  elif args.manifest != None or len(args.input) > 1:
+    from batch import get_batch_jobs, read_manifest
+    jobs = read_manifest(args.manifest, output_path) if args.manifest != None else []
+    if args.input != None:
+      if output_path == None:
+        parser.error('an output directory is required when processing several inputs')
+      jobs += get_batch_jobs(args.input, output_path)
+  else:
+    if output_path == None:
+      parser.error('an output file is required')
+    jobs = [(args.input[0], output_path)]
+
+  profile = args.profile or args.profile_json != None or args.profile_pstats != None
+  if profile and (args.watch or len(jobs) > 1 or args.manifest != None):
+    parser.error('profiling is only available when processing a single input')
+
+  if args.watch:
+    from watch import Watcher, WatchJob
+    watcher = Watcher([WatchJob(x, y) for x, y in jobs],
+                      lambda input, output: process_file(input, output, include_path, cache),
+                      args.watch_interval)
+    try:
+      watcher.run()
+    except KeyboardInterrupt:
+      pass
+    return
+
+  if len(jobs) > 1 or args.manifest != None:
+    from batch import run_batch
+    try:
+      failures = run_batch(jobs, include_path, cache, args.jobs)
+    except RuntimeError as e:
+      print(f"{type(e).__name__}: {e}")
+      sys.exit(1)
+    if failures != 0:
+      sys.exit(1)
+    return
 
   # process file
-  process_file(input_path, output_path, include_path)
-
-
-def process_file(input_file: str, output_file: str, include_path: List[str]) -> None:
-  file_source = Utils.load_file_source(input_file, include_path)
-  raw_source = file_source.copy()
-  included_file_list = FindIncludesPass(input_file, file_source, include_path)
-  included_files, identifiers = included_file_list.process()
-  blocks_detection_pass = BlocksMappingPass(input_file, file_source)
-  file_source, blocks = blocks_detection_pass.process()
-  program_pass = ProgramPass(input_file, file_source, blocks)
-  program, file_source = program_pass.process()
-  functions_pass = FunctionPass(input_file, file_source, blocks)
-  functions, file_source = functions_pass.process()
-  reg_alias_pass = RegisterAliasPass(input_file, file_source, blocks, identifiers, functions)
-  file_source = reg_alias_pass.process()
-  struct_pass = StructDeclarationPass(input_file, file_source, blocks, identifiers, functions)
-  structs, file_source = struct_pass.process()
-
-  variables_pass = VariablesPass(input_file, file_source, blocks, structs, identifiers)
-  file_source, blocks = variables_pass.process()
-
-  cond_pass = ConditionPass(input_file, file_source, blocks, identifiers, functions)
-  cond_pass.process()
-  final_source = file_source
+  profiler = PassProfiler(enabled=profile)
+  process_file(jobs[0][0], jobs[0][1], include_path, cache, profiler)
+
+  if args.profile:
+    sys.stderr.write(profiler.format_text())
+  if args.profile_json != None:
+    with open(args.profile_json, 'w') as f:
+      f.write(profiler.format_json())
+  if args.profile_pstats != None:
+    profiler.dump_stats(args.profile_pstats)
+
+
+def load_identifier_index(cache_dir: str):
+  # Imported here, runs without the persistent index do not need hashing
+  from support.identifier_index import (
+    IdentifierIndex,
+    get_default_cache_dir
+  )
+  return IdentifierIndex(cache_dir if cache_dir != None else get_default_cache_dir())
+
+
+def get_include_path(include_path: List[str], cwd: str) -> List[str]:
+  include_path = [] if include_path == None else list(include_path)
+  include_path.append(cwd)
+  return list(set(include_path))
+
+
+def process_file(input_file: str,
+                 output_file: str,
+                 include_path: List[str],
+                 cache: IncludeCache = None,
+                 profiler: PassProfiler = None) -> List[str]:
+  context = PassContext(input_file, include_path, cache, profiler)
+  try:
+    process_request(context, output_file)
+  finally:
+    sys.stdout.write(context.format_diagnostics())
+  return context.included_files
+
+def process_request(context: PassContext, output_file: str) -> None:
+  run_passes(context)
 
   #save file
   with open(output_file, 'w') as f:
-    f.write(Utils.get_flat_text(final_source))
+    context.source.write(f)
+
+def preprocess(context: PassContext) -> str:
+  run_passes(context)
+  output = io.StringIO()
+  context.source.write(output)
+  return output.getvalue()
+
+def run_passes(context: PassContext) -> None:
+  # Every pass works on the context of this request only, so requests can
+  # run concurrently. Only the include cache is shared, and it is locked.
+  profiler = context.profiler
+  source = context.load_source()
+  with profiler.measure("BlocksMappingPass", source):
+    blocks, scopes, features = load_pass("BlocksMappingPass")(context).process()
+
+  # Includes are checked for every source, the scans are cached
+  with profiler.measure("FindIncludesPass", source):
+    included_files, identifiers = load_pass("FindIncludesPass")(context).process()
+    context.set_included_files(included_files)
+
+  # Plain assembly has nothing to rewrite and is written out as it was read
+  if features & ~SourceFeature.BRANCH == SourceFeature.NONE:
+    return
+
+  with profiler.measure("ProgramPass", source):
+    program = load_pass("ProgramPass")(context, blocks).process()
+
+  # Optional passes are only imported and run when their construct was found
+  functions = []
+  if is_pass_needed("FunctionPass", features):
+    with profiler.measure("FunctionPass", source):
+      functions = load_pass("FunctionPass")(context, blocks, features).process()
+  # Also warns about undeclared identifiers, so it runs without aliases too
+  with profiler.measure("RegisterAliasPass", source):
+    load_pass("RegisterAliasPass")(context, blocks, scopes, identifiers, functions).process()
+  structs = StructRegistry()
+  if is_pass_needed("StructDeclarationPass", features):
+    with profiler.measure("StructDeclarationPass", source):
+      structs = load_pass("StructDeclarationPass")(context, blocks, identifiers, functions).process()
+
+  with profiler.measure("VariablesPass", source):
+    load_pass("VariablesPass")(context, blocks, scopes, structs, identifiers, features).process()
+
+  if is_pass_needed("ConditionPass", features):
+    with profiler.measure("ConditionPass", source):
+      load_pass("ConditionPass")(context, blocks, identifiers, functions).process()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+
+# Thin client of the resident pre-processor server ('rgbpre.py --serve').
+# It only depends on the standard library so that it starts fast, and falls
+# back to running rgbpre.py directly when no server is listening.
+import argparse
+import json
+import os
+import sys
+
+def get_default_socket_path() -> str:
+  return os.environ.get("RGBPRE_SOCKET", f"/tmp/rgbpre-{os.getuid()}.sock")
+
+def send_request(socket_path: str, request: dict) -> dict:
+  # Imported here, rgbpre.py only needs get_default_socket_path
+  import socket
+  with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+    client.connect(socket_path)
+    client.sendall(json.dumps(request).encode("utf-8") + b"\n")
+    with client.makefile("rb") as stream:
+      response = stream.readline()
+
+  if len(response) == 0:
+    raise ConnectionError(f"no response from server at {socket_path}")
+  return json.loads(response)
+
+def main():
+  parser = argparse.ArgumentParser(description='rgb pre-processor client')
+  parser.add_argument('-i', '--input', type=str,
+                      help='Input file name', nargs=1)
+  parser.add_argument('-o', '--output', type=str,
+                      help='Output file name', nargs=1)
+  parser.add_argument('-I', '--include', type=str,
+                      help='Include directory', nargs="*")
+  parser.add_argument('-s', '--socket', type=str, default=get_default_socket_path(),
+                      help='Server socket path')
+  parser.add_argument('--shutdown', action='store_true',
+                      help='Stop the server')
+  args = parser.parse_args()
+
+  if args.shutdown:
+    request = {"command": "shutdown"}
+  else:
+    request = {"command": "process",
+               "input": args.input[0],
+               "output": args.output[0],
+               "include": args.include if args.include != None else [],
+               "cwd": os.getcwd()}
+
+  try:
+    response = send_request(args.socket, request)
+  except (ConnectionError, FileNotFoundError):
+    if args.shutdown:
+      return 0
+    # No server running, process the file in this process instead
+    rgbpre = os.path.join(os.path.dirname(os.path.realpath(__file__)), "rgbpre.py")
+    arguments = [sys.executable, rgbpre, "-i", args.input[0], "-o", args.output[0]]
+    if args.include != None:
+      arguments += ["-I"] + args.include
+    os.execv(sys.executable, arguments)
+
+  sys.stdout.write(response.get("diagnostics", ""))
+  if response["status"] != 0:
+    sys.stderr.write(f"{response['error']}\n")
+  return response["status"]
+
+if __name__ == "__main__":
+  sys.exit(main())
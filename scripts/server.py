@@ -0,0 +1,87 @@
+import json
+import os
+import socket
+import socketserver
+import threading
+
+from rgbpre import (
+  get_include_path,
+  process_request
+)
+from support.include_cache import IncludeCache
+from support.pass_context import PassContext
+
+class RequestHandler(socketserver.StreamRequestHandler):
+  def handle(self) -> None:
+    for line in self.rfile:
+      response = self.server.handle_request_message(line)
+      self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+      self.wfile.flush()
+
+class PreprocessorServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+  # Keeps the passes imported and the include caches warm between requests.
+  # Each connection is served by a thread of its own.
+  def __init__(self, socket_path: str, cache: IncludeCache):
+    self._socket_path = socket_path
+    self._cache = cache
+    self._remove_stale_socket()
+    super().__init__(socket_path, RequestHandler)
+
+  def handle_request_message(self, message: bytes) -> dict:
+    try:
+      request = json.loads(message)
+    except ValueError:
+      return {"status": 1, "diagnostics": "", "error": "invalid request"}
+
+    command = request.get("command", "process")
+    if command == "shutdown":
+      # shutdown() waits for serve_forever(), reply without waiting for it
+      threading.Thread(target=self.shutdown).start()
+      return {"status": 0, "diagnostics": "", "error": ""}
+    elif command == "process":
+      return self._process(request)
+    return {"status": 1, "diagnostics": "", "error": f"unknown command '{command}'"}
+
+  def _process(self, request: dict) -> dict:
+    context = None
+    status = 0
+    error = ""
+    try:
+      # Relative paths are relative to the working directory of the client
+      cwd = request.get("cwd", os.getcwd())
+      input_file = os.path.join(cwd, request["input"])
+      output_file = os.path.join(cwd, request["output"])
+      include_path = get_include_path([os.path.join(cwd, x) for x in request.get("include", [])], cwd)
+
+      context = PassContext(input_file, include_path, self._cache)
+      process_request(context, output_file)
+    except Exception as e:
+      status = 1
+      error = f"{type(e).__name__}: {e}"
+    diagnostics = context.format_diagnostics() if context != None else ""
+    return {"status": status, "diagnostics": diagnostics, "error": error}
+
+  def server_close(self) -> None:
+    super().server_close()
+    if os.path.exists(self._socket_path):
+      os.remove(self._socket_path)
+
+  def _remove_stale_socket(self) -> None:
+    if not os.path.exists(self._socket_path):
+      return
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+      try:
+        probe.connect(self._socket_path)
+      except (ConnectionError, FileNotFoundError):
+        os.remove(self._socket_path)
+        return
+    raise RuntimeError(f"a server is already listening on {self._socket_path}")
+
+def serve(socket_path: str, cache: IncludeCache) -> None:
+  with PreprocessorServer(socket_path, cache) as server:
+    print(f"rgbpre server listening on {socket_path}")
+    try:
+      server.serve_forever()
+    except KeyboardInterrupt:
+      pass
@@ -1,6 +1,8 @@
 from enums import LabelOperation
 
 class Alias:
+  __slots__ = ("_position", "_name", "_register", "_op", "_parent_block_id")
+
   def __init__(self, position: int, name: str, register: str,
                  op: LabelOperation, parent_block_id: int):
     self._position = position
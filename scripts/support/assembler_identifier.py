@@ -2,6 +2,8 @@
 from enums import IdentifierType
 
 class AssemblerIdentifier:
+  __slots__ = ("_identifier_name", "_file_name", "_line", "_type")
+
   def __init__(self, identifier_name: str, file_name: str, line: int, type: IdentifierType):
     self._identifier_name = identifier_name
     self._file_name = file_name
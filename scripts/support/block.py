@@ -1,22 +1,20 @@
 import os
 
-from numpy import var
-
 from enums import (
   BlockMarkerType,
   BlockType,
   StorageType
 )
 from constants import *
-from support.data_structure import (
-  DataStructure,
-  get_basic_type_size,
-  get_struct_type_size
-)
+from support.condition import Condition
+from support.data_structure import get_basic_type_size
+from support.struct_layout import StructRegistry
 from support.variable import Variable
-from typing import List
+from typing import List, Optional
 
 class StackAllocationEntry:
+  __slots__ = ("_variable", "_offset", "_size")
+
   def __init__(self, variable: Variable, offset: int, size: int):
     self._variable = variable
     self._offset = offset
@@ -35,6 +33,8 @@ class StackAllocationEntry:
     return self._size
 
 class HeapAllocationEntry:
+  __slots__ = ("_variable", "_address", "_size")
+
   def __init__(self, variable: Variable, address: int, size: int):
     self._variable = variable
     self._address = address
@@ -54,14 +54,23 @@ class HeapAllocationEntry:
 
 
 class Block:
+  __slots__ = ("_start", "_end", "_type", "_id", "_variables", "_variables_by_name",
+               "_heap_addresses", "_stack_allocation_map", "_heap_allocation_map",
+               "_stack_allocation_size", "_heap_allocation_size", "_condition")
+
   def __init__(self, start: int, end: int,  type: BlockType, id: int):
     self._start = start
     self._end = end
     self._type = type
     self._id = id
     self._variables = []
+    self._variables_by_name = {}
+    self._heap_addresses = set()
     self._stack_allocation_map = []
     self._heap_allocation_map = []
+    self._stack_allocation_size = 0
+    self._heap_allocation_size = 0
+    self._condition = None
 
   @property
   def start(self) -> int:
@@ -91,97 +100,62 @@ class Block:
   def heap_allocation_map(self) -> List[HeapAllocationEntry]:
     return self._heap_allocation_map
 
-  def register_variable(self, var: Variable, structs: List[DataStructure], line: int, file: str) -> None:
-    names = get_variable_names(self._variables)
-    if var.name in names:
-      first = [x for x in self._variables if x.name == var.name][0]
+  @property
+  def stack_allocation_size(self) -> int:
+    return self._stack_allocation_size
+
+  @property
+  def heap_allocation_size(self) -> int:
+    return self._heap_allocation_size
+
+  @property
+  def condition(self) -> Optional[Condition]:
+    # Parsed '.cnd:' chain of an 'if' block
+    return self._condition
+
+  def set_condition(self, condition: Condition) -> None:
+    self._condition = condition
+
+  def get_variable(self, name: str) -> Optional[Variable]:
+    return self._variables_by_name.get(name)
+
+  def register_variable(self, var: Variable, structs: StructRegistry, line: int, file: str) -> None:
+    if var.name in self._variables_by_name:
+      first = self._variables_by_name[var.name]
       raise RuntimeError(f"{os.path.basename(file)} line " +
                          f"{line + 1}: variable '{var.name}' defined multiple times under " +
                          f"the same scope (first found in line {first.position + 1})")
 
     if var.storage.storage == StorageType.HEAP_STORAGE:
-      addresses = get_variable_address(self._variables)
-      if var.storage.address in addresses:
+      if var.storage.address in self._heap_addresses:
         raise RuntimeError(f"{os.path.basename(file)} line " +
                           f"{line + 1}: multiple variable definitions at the same address '{var.storage.address}'")
 
+    size = get_variable_size(var.type, structs, line, file)
     self._variables.append(var)
+    self._variables_by_name[var.name] = var
 
+    # Stack variables are laid out in declaration order
     if var.storage.storage == StorageType.STACK_STORAGE:
-      self._generate_stack_allocation_map(structs)
+      self._stack_allocation_map.append(StackAllocationEntry(var, self._stack_allocation_size, size))
+      self._stack_allocation_size += size
     elif var.storage.storage == StorageType.HEAP_STORAGE:
-      self._generate_heap_allocation_map(structs)
-
-  def _generate_stack_allocation_map(self, structs: List[DataStructure]) -> None:
-    self._stack_allocation_map = []
-
-    stack_vars = [x for x in self._variables if x.storage.storage == StorageType.STACK_STORAGE]
-    stack_offset = 0
-    for var in stack_vars:
-      size = 0
-
-      if var.type in VARIABLE_BASIC_TYPES:
-        size = get_basic_type_size(var.type, 0, "")
-      else:
-        struct_type = [x for x in structs if x.name == var.type][0]
-        if struct_type != None:
-          size = get_struct_type_size(struct_type, 0, "")
-
-      self._stack_allocation_map.append(StackAllocationEntry(var, stack_offset, size))
-      stack_offset += size
-
-  def _generate_heap_allocation_map(self, structs: List[DataStructure]) -> None:
-    self._heap_allocation_map = []
-
-    stack_vars = [x for x in self._variables if x.storage.storage == StorageType.HEAP_STORAGE]
-    for var in stack_vars:
-      if var.type in VARIABLE_BASIC_TYPES:
-        size = get_basic_type_size(var.type, 0, "")
-      else:
-        struct_type = [x for x in structs if x.name == var.type][0]
-        if struct_type != None:
-          size = get_struct_type_size(struct_type, 0, "")
-
+      self._heap_addresses.add(var.storage.address)
       self._heap_allocation_map.append(HeapAllocationEntry(var, var.storage.address, size))
+      self._heap_allocation_size += size
 
-def get_stack_allocation_size(variables: List[Variable], structs: List[DataStructure], line: int, file: str) -> int:
-  stack_vars = [x for x in variables if x.storage.storage == StorageType.STACK_STORAGE]
-  stack_space = 0
-  for var in stack_vars:
-    if var.type in VARIABLE_BASIC_TYPES:
-      stack_space += get_basic_type_size(var.type, line, file)
-    else:
-      struct_type = [x for x in structs if x.name == var.type][0]
-      if struct_type != None:
-        stack_space += get_struct_type_size(struct_type, line, file)
-      else:
-        raise RuntimeError(f"{os.path.basename(file)} line " +
-                        f"{line + 1}: invalid data type '{var.type}'")
-  return stack_space
-
-def get_heap_allocation_size(variables: List[Variable], structs: List[DataStructure], line: int, file: str) -> int:
-  heap_vars = [x for x in variables if x.storage.storage == StorageType.HEAP_STORAGE]
-  total_heap = 0
-  for var in heap_vars:
-    if var.type in VARIABLE_BASIC_TYPES:
-      total_heap += get_basic_type_size(var.type, line, file)
-    else:
-      struct_type = [x for x in structs if x.name == var.type][0]
-      if struct_type != None:
-        total_heap += get_struct_type_size(struct_type, line, file)
-      else:
-        raise RuntimeError(f"{os.path.basename(file)} line " +
-                        f"{line + 1}: invalid data type '{var.type}'")
-  return total_heap
-
-def get_variable_names(variables: List[Variable]) -> List[str]:
-  return [x.name for x in variables]
-
-def get_variable_address(variables: List[Variable]) -> List[str]:
-  return [x.storage.address for x in variables if x.storage.storage == StorageType.HEAP_STORAGE]
+def get_variable_size(type: str, structs: StructRegistry, line: int, file: str) -> int:
+  if type in VARIABLE_BASIC_TYPES:
+    return get_basic_type_size(type, line, file)
+  elif type in structs:
+    return structs.get(type).size
+  raise RuntimeError(f"{os.path.basename(file)} line " +
+                     f"{line + 1}: invalid data type '{type}'")
 
 
 class BlockMarker:
+  __slots__ = ("_position", "_type")
+
   def __init__(self, position: int, type: BlockMarkerType):
     self._position = position
     self._type = type
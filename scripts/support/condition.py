@@ -1,25 +1,74 @@
+from enums import ConditionalOperand
+
+class ConditionOperand:
+  __slots__ = ("_type", "_text")
+
+  def __init__(self, type: ConditionalOperand, text: str):
+    self._type = type
+    self._text = text
+
+  @property
+  def type(self) -> ConditionalOperand:
+    return self._type
+
+  @property
+  def text(self) -> str:
+    # Operand as written, brackets included for memory operands
+    return self._text
+
+  @property
+  def address(self) -> str:
+    # Address expression of a memory operand
+    return self._text[1:-1].strip() if self._type == ConditionalOperand.MEMORY_ALIAS else ""
+
 class Condition:
-  def __init__(self, left_op: str, right_op: str, boolean_op: str, logic_op: str):
-    self._left_operand = left_op
-    self._right_operand = right_op
-    self._bool_operand = boolean_op
-    self._logic_operand = logic_op
+  # Node of the condition tree of a 'blk if', either a Comparison or a
+  # LogicalCondition joining two nodes
+  __slots__ = ()
+
+class Comparison(Condition):
+  __slots__ = ("_left", "_operator", "_right", "_line")
+
+  def __init__(self, left: ConditionOperand, operator: str, right: ConditionOperand, line: int):
+    self._left = left
+    self._operator = operator
+    self._right = right
+    self._line = line
 
   @property
-  def left_operand(self) -> str:
-    return self._left_operand
+  def left(self) -> ConditionOperand:
+    return self._left
 
   @property
-  def right_operand(self) -> str:
-    return self._right_operand
+  def operator(self) -> str:
+    # One of 'eq', 'ne', 'lt', 'le', 'gt' or 'ge'
+    return self._operator
 
   @property
-  def bool_operand(self) -> str:
-    return self._bool_operand
+  def right(self) -> ConditionOperand:
+    return self._right
 
   @property
-  def logic_operand(self) -> str:
-    return self._logic_operand
+  def line(self) -> int:
+    return self._line
+
+class LogicalCondition(Condition):
+  __slots__ = ("_operator", "_left", "_right")
 
-  def validate_conditin(self) -> None:
-    return
\ No newline at end of file
+  def __init__(self, operator: str, left: Condition, right: Condition):
+    self._operator = operator
+    self._left = left
+    self._right = right
+
+  @property
+  def operator(self) -> str:
+    # 'and' or 'or'
+    return self._operator
+
+  @property
+  def left(self) -> Condition:
+    return self._left
+
+  @property
+  def right(self) -> Condition:
+    return self._right
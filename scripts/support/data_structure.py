@@ -37,6 +37,8 @@ def convert_type_to_size(type: AttributeType) -> int:
 
 
 class Attribute:
+  __slots__ = ("_name", "_offset", "_type")
+
   def __init__(self, name: str, type: AttributeType, offset: int):
     self._name = name
     self._offset = offset
@@ -55,6 +57,8 @@ class Attribute:
     return self._type
 
 class DataStructure:
+  __slots__ = ("_name", "_attributes")
+
   def __init__(self, name: str):
     self._name = name
     self._attributes = []
@@ -90,9 +94,3 @@ def get_basic_type_size(type_name: str, line:int, file:str) -> int:
     raise RuntimeError(f"{os.path.basename(file)} line " +
                         f"{line + 1}: invalid type '{type_name}'")
   return size
-
-def get_struct_type_size(type: DataStructure, line:int, file:str) -> int:
-  size = 0
-  for att in type.attribures:
-    size += get_basic_type_size(att.type.value, line, file)
-  return size
\ No newline at end of file
@@ -2,6 +2,8 @@ from .block import Block
 from constants import *
 
 class Function:
+  __slots__ = ("_name", "_block", "_label")
+
   def __init__(self, name: str, block: Block):
     self._name = name
     self._block = block
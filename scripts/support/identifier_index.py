@@ -0,0 +1,87 @@
+import hashlib
+import marshal
+import os
+import threading
+from typing import Optional, Tuple
+
+from enums import IdentifierType
+from support.assembler_identifier import AssemblerIdentifier
+from support.include_scan import IncludeScan
+
+# Bump whenever the entry layout or the scanning rules change
+INDEX_VERSION = 2
+
+def get_default_cache_dir() -> str:
+  base = os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache"))
+  return os.path.join(base, "rgbpre")
+
+def hash_content(content: bytes) -> str:
+  return hashlib.sha1(content).hexdigest()
+
+class IndexEntry:
+  def __init__(self, stamp: Tuple[int, int], content_hash: str, scan: IncludeScan):
+    self._stamp = stamp
+    self._content_hash = content_hash
+    self._scan = scan
+
+  @property
+  def stamp(self) -> Tuple[int, int]:
+    return self._stamp
+
+  @property
+  def content_hash(self) -> str:
+    return self._content_hash
+
+  @property
+  def scan(self) -> IncludeScan:
+    return self._scan
+
+class IdentifierIndex:
+  # On-disk index of include scans, one marshal file per included path:
+  # (version, path, mtime, size, content hash, includes, binary includes,
+  # identifiers)
+  def __init__(self, cache_dir: str):
+    self._cache_dir = cache_dir
+
+  @property
+  def cache_dir(self) -> str:
+    return self._cache_dir
+
+  def load(self, os_path: str) -> Optional[IndexEntry]:
+    try:
+      with open(self._entry_path(os_path), "rb") as f:
+        entry = marshal.load(f)
+      version, path, mtime, size, content_hash, includes, binary_includes, identifiers = entry
+    except (OSError, EOFError, ValueError, TypeError):
+      return None
+
+    if version != INDEX_VERSION or path != os_path:
+      return None
+
+    scan = IncludeScan([(include, line) for include, line in includes],
+                       [(include, line) for include, line in binary_includes],
+                       [AssemblerIdentifier(name, os_path, line, IdentifierType(type))
+                        for name, line, type in identifiers])
+    return IndexEntry((mtime, size), content_hash, scan)
+
+  def store(self, os_path: str, stamp: Tuple[int, int], content_hash: str, scan: IncludeScan) -> None:
+    entry = (INDEX_VERSION, os_path, stamp[0], stamp[1], content_hash,
+             tuple(scan.includes),
+             tuple(scan.binary_includes),
+             tuple((x.identifier_name, x.line, x.type.value) for x in scan.identifiers))
+
+    # A missing or read-only cache directory only costs the warm start
+    entry_path = self._entry_path(os_path)
+    temp_path = f"{entry_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+      os.makedirs(self._cache_dir, exist_ok=True)
+      with open(temp_path, "wb") as f:
+        marshal.dump(entry, f)
+      os.replace(temp_path, entry_path)
+    except OSError:
+      if os.path.exists(temp_path):
+        os.remove(temp_path)
+
+  def _entry_path(self, os_path: str) -> str:
+    name = hashlib.sha1(os_path.encode("utf-8")).hexdigest()
+    return os.path.join(self._cache_dir, f"{name}.idx")
@@ -0,0 +1,80 @@
+import os
+import threading
+from typing import TYPE_CHECKING, Callable, Optional, Tuple
+
+from support.include_scan import IncludeScan
+from support.source_buffer import SourceBuffer
+from utils import Utils
+
+if TYPE_CHECKING:
+  # Only loaded by runs that use the persistent index
+  from support.identifier_index import IdentifierIndex
+
+class IncludeCache:
+  # Safe to share between threads. Two threads missing the same file may both
+  # scan it, they store the same result.
+  def __init__(self, index: "IdentifierIndex" = None):
+    self._entries = {}
+    self._index = index
+    self._lock = threading.Lock()
+
+  @property
+  def index(self) -> Optional["IdentifierIndex"]:
+    return self._index
+
+  def __getstate__(self) -> dict:
+    # Handed to batch worker processes, each one gets a lock of its own
+    state = self.__dict__.copy()
+    del state["_lock"]
+    return state
+
+  def __setstate__(self, state: dict) -> None:
+    self.__dict__.update(state)
+    self._lock = threading.Lock()
+
+  @staticmethod
+  def identify(os_path: str) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+    # Returns the file identity (device, inode) and its modification stamp
+    info = os.stat(os_path)
+    return (info.st_dev, info.st_ino), (info.st_mtime_ns, info.st_size)
+
+  def get(self, key: Tuple[int, int], stamp: Tuple[int, int]) -> Optional[IncludeScan]:
+    with self._lock:
+      entry = self._entries.get(key)
+    if entry == None or entry[0] != stamp:
+      return None
+    return entry[1]
+
+  def put(self, key: Tuple[int, int], stamp: Tuple[int, int], scan: IncludeScan) -> None:
+    with self._lock:
+      self._entries[key] = (stamp, scan)
+
+  def scan(self, os_path: str, scanner: Callable[[str, SourceBuffer], IncludeScan]) -> IncludeScan:
+    key, stamp = IncludeCache.identify(os_path)
+    scan = self.get(key, stamp)
+    if scan != None:
+      return scan
+
+    entry = self._index.load(os_path) if self._index != None else None
+    if entry != None and entry.stamp == stamp:
+      self.put(key, stamp, entry.scan)
+      return entry.scan
+
+    with Utils.load_file_source(os_path, [], mapped=True) as source:
+      content_hash = ""
+      if self._index != None:
+        from support.identifier_index import hash_content
+        content_hash = hash_content(source.content)
+      if entry != None and entry.content_hash == content_hash:
+        # Touched but unchanged, refresh the stamp only
+        scan = entry.scan
+      else:
+        scan = scanner(os_path, source)
+
+    self.put(key, stamp, scan)
+    if self._index != None:
+      self._index.store(os_path, stamp, content_hash, scan)
+    return scan
+
+# Shared by every FindIncludesPass of the process
+INCLUDE_CACHE = IncludeCache()
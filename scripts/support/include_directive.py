@@ -0,0 +1,53 @@
+from typing import Optional
+
+from constants import *
+
+class IncludeDirective:
+  __slots__ = ("_keyword", "_path", "_column")
+
+  def __init__(self, keyword: str, path: str, column: int):
+    self._keyword = keyword
+    self._path = path
+    self._column = column
+
+  @property
+  def keyword(self) -> str:
+    return self._keyword
+
+  @property
+  def path(self) -> str:
+    return self._path
+
+  @property
+  def column(self) -> int:
+    # Position of the path in the line, after the opening quote
+    return self._column
+
+  @property
+  def is_binary(self) -> bool:
+    return self._keyword == KEYWORD_INCBIN
+
+def scan_include_directive(clear_line: str) -> Optional[IncludeDirective]:
+  # Reads 'include "path"' or 'incbin "path"' at the start of a line without
+  # comments. Every character is looked at a bounded number of times, so
+  # long or unterminated lines cost linear time.
+  if clear_line.startswith(KEYWORD_INCLUDE):
+    keyword = KEYWORD_INCLUDE
+  elif clear_line.startswith(KEYWORD_INCBIN):
+    keyword = KEYWORD_INCBIN
+  else:
+    return None
+
+  rest = clear_line[len(keyword):].lstrip()
+  if not rest.startswith('"'):
+    return None
+  position = len(clear_line) - len(rest)
+
+  # Only white spaces may follow the last quote
+  last_quote = clear_line.rfind('"')
+  if last_quote == position or clear_line[last_quote + 1:].strip() != "":
+    return None
+
+  # The path ends at the first closing quote
+  end = clear_line.find('"', position + 1)
+  return IncludeDirective(keyword, clear_line[position + 1:end], position + 1)
@@ -0,0 +1,26 @@
+from typing import List, Tuple
+
+from support.assembler_identifier import AssemblerIdentifier
+
+class IncludeScan:
+  def __init__(self,
+               includes: List[Tuple[str, int]],
+               binary_includes: List[Tuple[str, int]],
+               identifiers: List[AssemblerIdentifier]):
+    self._includes = includes
+    self._binary_includes = binary_includes
+    self._identifiers = identifiers
+
+  @property
+  def includes(self) -> List[Tuple[str, int]]:
+    # (included path as written in the source, line)
+    return self._includes
+
+  @property
+  def binary_includes(self) -> List[Tuple[str, int]]:
+    # 'incbin' paths, dependencies that are never scanned
+    return self._binary_includes
+
+  @property
+  def identifiers(self) -> List[AssemblerIdentifier]:
+    return self._identifiers
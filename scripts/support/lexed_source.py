@@ -0,0 +1,168 @@
+from typing import Iterator, List, Sequence, TextIO
+
+class LexedLine:
+  __slots__ = ("_text", "_code", "_comment", "_tokens", "_indentation",
+               "_operand_tokens", "_text_tokens")
+
+  def __init__(self, text: str):
+    index = text.find(';')
+    self._text = text
+    self._code = text if index == -1 else text[:index]
+    self._comment = "" if index == -1 else text[index:]
+    self._tokens = self._code.split()
+    self._indentation = self._code[:len(self._code) - len(self._code.lstrip())]
+    self._operand_tokens = None
+    self._text_tokens = None
+
+  @property
+  def text(self) -> str:
+    return self._text
+
+  @property
+  def code(self) -> str:
+    return self._code
+
+  @property
+  def comment(self) -> str:
+    return self._comment
+
+  @property
+  def tokens(self) -> List[str]:
+    return self._tokens
+
+  @property
+  def indentation(self) -> str:
+    return self._indentation
+
+  @property
+  def operand_tokens(self) -> List[str]:
+    # Tokens of the code part using both white spaces and commas as separators
+    if self._operand_tokens is None:
+      self._operand_tokens = self._code.replace(',', ' ').split()
+    return self._operand_tokens
+
+  @property
+  def text_tokens(self) -> List[str]:
+    # Tokens of the whole line, comments included
+    if self._text_tokens is None:
+      self._text_tokens = self._text.split()
+    return self._text_tokens
+
+class LineEdit:
+  # Edits recorded against one line of the original source, rendered as
+  # <before><label><marker><content><after>
+  __slots__ = ("before", "label", "marker", "content", "after")
+
+  def __init__(self, content: str):
+    self.before = []
+    self.label = ""
+    self.marker = ""
+    self.content = content
+    self.after = []
+
+  def render(self) -> str:
+    return "".join(self.before) + self.label + self.marker + self.content + "".join(self.after)
+
+class LexedSource:
+  def __init__(self, lines: Sequence[str]):
+    # Lines are lexed on first use, a SourceBuffer only decodes those
+    self._originals = lines
+    self._appended = []
+    self._lines = [None] * len(lines)
+    self._edits = {}
+    # Read by the pass profiler, visits are only counted while profiling
+    self._line_rewrites = 0
+
+  @property
+  def line_rewrites(self) -> int:
+    return self._line_rewrites
+
+  def __len__(self) -> int:
+    return len(self._lines)
+
+  def __iter__(self) -> Iterator[str]:
+    for idx in range(len(self._lines)):
+      yield self._render(idx)
+
+  def __getitem__(self, idx: int) -> str:
+    return self._render(idx)
+
+  def append(self, text: str) -> None:
+    self._line_rewrites += 1
+    self._appended.append(text)
+    self._lines.append(None)
+
+  def original(self, idx: int) -> str:
+    if idx < len(self._originals):
+      return self._originals[idx]
+    return self._appended[idx - len(self._originals)]
+
+  def line(self, idx: int) -> LexedLine:
+    return self._lexed(idx)
+
+  def code(self, idx: int) -> str:
+    return self._lexed(idx).code
+
+  def tokens(self, idx: int) -> List[str]:
+    return self._lexed(idx).tokens
+
+  def content(self, idx: int) -> LexedLine:
+    # The line without its label, marker and inserted lines
+    edit = self._edits.get(idx)
+    return self._lexed(idx) if edit == None else LexedLine(edit.content)
+
+  def comment_out(self, idx: int, marker: str = "; ") -> None:
+    edit = self._edit(idx)
+    edit.marker = marker + edit.marker
+
+  def add_label(self, idx: int, label: str) -> None:
+    edit = self._edit(idx)
+    edit.label = label + edit.label
+
+  def insert_before(self, idx: int, text: str) -> None:
+    self._edit(idx).before.insert(0, text)
+
+  def insert_after(self, idx: int, text: str) -> None:
+    self._edit(idx).after.append(text)
+
+  def replace_code(self, idx: int, code: str) -> None:
+    # Replaces the code part of the line, its comment is kept. The label,
+    # marker and inserted lines are edits of their own and stay as they are.
+    content = self.content(idx)
+    if content.code != code:
+      self._edit(idx).content = code + content.comment
+
+  def write(self, stream: TextIO) -> None:
+    for idx in range(len(self._lines)):
+      edit = self._edits.get(idx)
+      if edit == None:
+        stream.write(self.original(idx))
+        continue
+      for part in edit.before:
+        stream.write(part)
+      stream.write(edit.label)
+      stream.write(edit.marker)
+      stream.write(edit.content)
+      for part in edit.after:
+        stream.write(part)
+
+  def _edit(self, idx: int) -> LineEdit:
+    self._line_rewrites += 1
+    edit = self._edits.get(idx)
+    if edit == None:
+      edit = LineEdit(self.original(idx))
+      self._edits[idx] = edit
+    # Lexed again on the next read
+    self._lines[idx] = None
+    return edit
+
+  def _render(self, idx: int) -> str:
+    edit = self._edits.get(idx)
+    return self.original(idx) if edit == None else edit.render()
+
+  def _lexed(self, idx: int) -> LexedLine:
+    line = self._lines[idx]
+    if line is None:
+      line = LexedLine(self._render(idx))
+      self._lines[idx] = line
+    return line
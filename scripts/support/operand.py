@@ -1,19 +1,26 @@
+from typing import Optional
+
 from enums import *
 from utils import *
 from support.block import Block
+from support.struct_layout import (
+  AttributeLayout,
+  StructRegistry
+)
 
 class Operand:
-  def __init__(self, operand_code: str, block: Block, line: int, file: str):
+  def __init__(self, operand_code: str, block: Block, structs: StructRegistry, line: int, file: str):
     self._line = line
     self._file = file
     self._operand_type = OperandType.INVALID_OPERAND
-    self._parse_operand(operand_code, block)
+    self._parse_operand(operand_code, block, structs)
 
-  def _parse_operand(self, operand_code: str, block: Block) -> None:
+  def _parse_operand(self, operand_code: str, block: Block, structs: StructRegistry) -> None:
     operand = operand_code.replace(',','')
     self._operand_name = ""
     self._operand_attr_name = ""
     self._operand_data_type = ""
+    self._operand_attribute = None
 
     if '.' in operand:
       self._operand_name = operand.split('.')[0]
@@ -25,22 +32,26 @@ class Operand:
       self._operand_type = OperandType.REGISTER_OPERAND
     elif re.match(NUMBER_REGEX, self._operand_name):
       self._operand_type = OperandType.LITERAL_OPERAND
-    elif self._find_variable_declaration_in_block(self._operand_name, block):
-      self._operand_data_type = self._get_variable_type(self._operand_name, block)
+    else:
+      variable = block.get_variable(self._operand_name)
+      if variable == None:
+        raise RuntimeError(f"{os.path.basename(self._file)} line " +
+                           f"{self._line + 1}: unknown variable '{self._operand_name}'")
+      self._operand_data_type = variable.type
       self._operand_type = OperandType.VARIABLE_OPERAND
+      if self._operand_attr_name != "":
+        self._operand_attribute = self._find_attribute(variable.type, structs)
 
-  def _get_variable_type(self, name:str, block: Block) -> str:
-    for var in block.variables:
-      if var.name == name:
-        return var.type
-    raise RuntimeError(f"{os.path.basename(self._file)} line " +
-                       f"{self._line + 1}: unknown variable '{name}'")
-
-  def _find_variable_declaration_in_block(self, name:str, block: Block) -> bool:
-    if name in [x.name for x in block.variables]:
-      return True
-    raise RuntimeError(f"{os.path.basename(self._file)} line " +
-                       f"{self._line + 1}: unknown variable '{name}'")
+  def _find_attribute(self, type: str, structs: StructRegistry) -> AttributeLayout:
+    layout = structs.get(type)
+    if layout == None:
+      raise RuntimeError(f"{os.path.basename(self._file)} line " +
+                         f"{self._line + 1}: variable '{self._operand_name}' of type '{type}' has no attributes")
+    attribute = layout.get_attribute(self._operand_attr_name)
+    if attribute == None:
+      raise RuntimeError(f"{os.path.basename(self._file)} line " +
+                         f"{self._line + 1}: unknown attribute '{self._operand_attr_name}' in data structure '{type}'")
+    return attribute
 
   @property
   def operand_type(self) -> OperandType:
@@ -57,3 +68,7 @@ class Operand:
   @property
   def operand_data_type(self) -> str:
     return self._operand_data_type
+
+  @property
+  def operand_attribute(self) -> Optional[AttributeLayout]:
+    return self._operand_attribute
@@ -0,0 +1,67 @@
+from typing import List
+
+from support.include_cache import (
+  INCLUDE_CACHE,
+  IncludeCache
+)
+from support.lexed_source import LexedSource
+from support.profiler import PassProfiler
+from utils import Utils
+
+class PassContext:
+  # State of a single pre-processing request. Passes edit its source and
+  # report their diagnostics to it, so requests never share mutable state
+  # except the include cache.
+  def __init__(self,
+               input_file: str,
+               include_path: List[str],
+               cache: IncludeCache = None,
+               profiler: PassProfiler = None):
+    self._input_file = input_file
+    self._include_path = include_path
+    self._cache = cache if cache != None else INCLUDE_CACHE
+    self._profiler = profiler if profiler != None else PassProfiler(enabled=False)
+    self._source = None
+    self._included_files = []
+    self._diagnostics = []
+
+  @property
+  def input_file(self) -> str:
+    return self._input_file
+
+  @property
+  def include_path(self) -> List[str]:
+    return self._include_path
+
+  @property
+  def cache(self) -> IncludeCache:
+    return self._cache
+
+  @property
+  def profiler(self) -> PassProfiler:
+    return self._profiler
+
+  @property
+  def source(self) -> LexedSource:
+    return self._source
+
+  @property
+  def included_files(self) -> List[str]:
+    return self._included_files
+
+  @property
+  def diagnostics(self) -> List[str]:
+    return self._diagnostics
+
+  def load_source(self) -> LexedSource:
+    self._source = self._profiler.create_source(Utils.load_file_source(self._input_file, self._include_path))
+    return self._source
+
+  def set_included_files(self, included_files: List[str]) -> None:
+    self._included_files = included_files
+
+  def report(self, message: str) -> None:
+    self._diagnostics.append(message)
+
+  def format_diagnostics(self) -> str:
+    return "".join(f"{x}\n" for x in self._diagnostics)
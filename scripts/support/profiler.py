@@ -0,0 +1,164 @@
+import contextlib
+import time
+from typing import Iterator, List, Sequence
+
+from support.lexed_source import (
+  LexedLine,
+  LexedSource
+)
+
+REGEX_METHOD_SUFFIX = "of 're.Pattern' objects>"
+
+class CountingLexedSource(LexedSource):
+  # Source of a profiled run, counts every line read by the passes
+  def __init__(self, lines: Sequence[str]):
+    super().__init__(lines)
+    self._line_visits = 0
+
+  @property
+  def line_visits(self) -> int:
+    return self._line_visits
+
+  def __iter__(self) -> Iterator[str]:
+    for line in super().__iter__():
+      self._line_visits += 1
+      yield line
+
+  def __getitem__(self, idx: int) -> str:
+    self._line_visits += 1
+    return super().__getitem__(idx)
+
+  def line(self, idx: int) -> LexedLine:
+    self._line_visits += 1
+    return super().line(idx)
+
+  def code(self, idx: int) -> str:
+    self._line_visits += 1
+    return super().code(idx)
+
+  def tokens(self, idx: int) -> List[str]:
+    self._line_visits += 1
+    return super().tokens(idx)
+
+class PassProfile:
+  def __init__(self,
+               name: str,
+               wall_time: float,
+               line_visits: int,
+               line_rewrites: int,
+               regex_evaluations: int):
+    self._name = name
+    self._wall_time = wall_time
+    self._line_visits = line_visits
+    self._line_rewrites = line_rewrites
+    self._regex_evaluations = regex_evaluations
+
+  @property
+  def name(self) -> str:
+    return self._name
+
+  @property
+  def wall_time(self) -> float:
+    return self._wall_time
+
+  @property
+  def line_visits(self) -> int:
+    return self._line_visits
+
+  @property
+  def line_rewrites(self) -> int:
+    return self._line_rewrites
+
+  @property
+  def regex_evaluations(self) -> int:
+    return self._regex_evaluations
+
+  def to_dict(self) -> dict:
+    return {"name": self._name,
+            "wall_time": self._wall_time,
+            "line_visits": self._line_visits,
+            "line_rewrites": self._line_rewrites,
+            "regex_evaluations": self._regex_evaluations}
+
+class PassProfiler:
+  # Measures every pass of process_file. Regex evaluations are the calls to
+  # re.Pattern methods recorded by cProfile, so wall times include the
+  # profiler overhead unless trace_calls is disabled (no regex counts then).
+  def __init__(self, enabled: bool = True, trace_calls: bool = True):
+    self._enabled = enabled
+    self._trace_calls = trace_calls
+    self._profiles = []
+    self._stats = None
+
+  @property
+  def enabled(self) -> bool:
+    return self._enabled
+
+  @property
+  def profiles(self) -> List[PassProfile]:
+    return self._profiles
+
+  def create_source(self, lines: Sequence[str]) -> LexedSource:
+    # Plain runs get a source without the visit counting
+    return CountingLexedSource(lines) if self._enabled else LexedSource(lines)
+
+  @contextlib.contextmanager
+  def measure(self, name: str, source: LexedSource) -> Iterator[None]:
+    if not self._enabled:
+      yield
+      return
+
+    line_visits = source.line_visits
+    line_rewrites = source.line_rewrites
+    profile = None
+    if self._trace_calls:
+      # Imported here, cProfile and pstats add to the start up of every run
+      import cProfile
+      profile = cProfile.Profile()
+    start = time.perf_counter()
+    if profile != None:
+      profile.enable()
+    try:
+      yield
+    finally:
+      if profile != None:
+        profile.disable()
+      wall_time = time.perf_counter() - start
+      regex_evaluations = 0
+      if profile != None:
+        import pstats
+        stats = pstats.Stats(profile)
+        regex_evaluations = sum(calls for (_, _, function), (_, calls, _, _, _) in stats.stats.items()
+                                if function.endswith(REGEX_METHOD_SUFFIX))
+        if self._stats == None:
+          self._stats = stats
+        else:
+          self._stats.add(stats)
+      self._profiles.append(PassProfile(name,
+                                        wall_time,
+                                        source.line_visits - line_visits,
+                                        source.line_rewrites - line_rewrites,
+                                        regex_evaluations))
+
+  def get_total(self) -> PassProfile:
+    return PassProfile("total",
+                       sum(x.wall_time for x in self._profiles),
+                       sum(x.line_visits for x in self._profiles),
+                       sum(x.line_rewrites for x in self._profiles),
+                       sum(x.regex_evaluations for x in self._profiles))
+
+  def format_text(self) -> str:
+    lines = [f"{'pass':<24}{'time (ms)':>12}{'visits':>10}{'rewrites':>10}{'regex':>10}"]
+    for profile in self._profiles + [self.get_total()]:
+      lines.append(f"{profile.name:<24}{profile.wall_time * 1000:>12.3f}{profile.line_visits:>10}"
+                   f"{profile.line_rewrites:>10}{profile.regex_evaluations:>10}")
+    return "\n".join(lines) + "\n"
+
+  def format_json(self) -> str:
+    import json
+    return json.dumps({"passes": [x.to_dict() for x in self._profiles],
+                       "total": self.get_total().to_dict()}, indent=2) + "\n"
+
+  def dump_stats(self, path: str) -> None:
+    if self._stats != None:
+      self._stats.dump_stats(path)
@@ -0,0 +1,57 @@
+from typing import List, Optional
+
+from support.block import Block
+
+class ScopeIndex:
+  def __init__(self, blocks: List[Block], line_count: int):
+    self._blocks = {}
+    self._parents = {}
+    self._innermost = [-1] * line_count
+
+    # Blocks are properly nested, so a sweep in start order with a stack of
+    # open blocks yields both the parent of each block and the innermost block
+    # of each line.
+    open_blocks = []
+    next_line = 0
+    for block in sorted(blocks, key=lambda x: (x.start, -x.end)):
+      self._fill_lines(open_blocks, next_line, block.start)
+      next_line = block.start
+      while len(open_blocks) != 0 and open_blocks[-1].end < block.start:
+        open_blocks.pop()
+
+      self._blocks[block.id] = block
+      self._parents[block.id] = open_blocks[-1].id if len(open_blocks) != 0 else -1
+      open_blocks.append(block)
+    self._fill_lines(open_blocks, next_line, line_count)
+
+  def _fill_lines(self, open_blocks: List[Block], first: int, last: int) -> None:
+    # Assigns lines [first, last) to the innermost open block, closing blocks
+    # as their end line is passed
+    line = first
+    while line < last and len(open_blocks) != 0:
+      block = open_blocks[-1]
+      if block.end < line:
+        open_blocks.pop()
+        continue
+      stop = min(block.end + 1, last)
+      self._innermost[line:stop] = [block.id] * (stop - line)
+      line = stop
+
+  def innermost_block_id(self, line: int) -> int:
+    if line < 0 or line >= len(self._innermost):
+      return -1
+    return self._innermost[line]
+
+  def innermost_block(self, line: int) -> Optional[Block]:
+    return self._blocks.get(self.innermost_block_id(line))
+
+  def parent_block_id(self, block_id: int) -> int:
+    return self._parents.get(block_id, -1)
+
+  def is_inside(self, inner_id: int, outer_id: int) -> bool:
+    # A block is considered to be inside itself
+    if inner_id not in self._blocks or outer_id not in self._blocks:
+      return False
+    inner = self._blocks[inner_id]
+    outer = self._blocks[outer_id]
+    return outer.start <= inner.start and inner.end <= outer.end
@@ -0,0 +1,83 @@
+import locale
+import mmap
+from bisect import bisect_right
+from typing import Iterator, List
+
+class SourceBuffer:
+  # Read-only view of a source file. Lines are decoded only when requested,
+  # so scanning a large include with byte patterns does not create a string
+  # per line. Mapped buffers read the file while they are used, so they are
+  # only meant for short read-only scans. Files that outlive a scan, like
+  # the one being pre-processed, are copied into memory.
+  def __init__(self, os_path: str, mapped: bool = False):
+    self._os_path = os_path
+    self._encoding = locale.getpreferredencoding(False)
+    with open(os_path, 'rb') as f:
+      if mapped:
+        try:
+          self._content = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+          # Empty files can not be mapped
+          self._content = b""
+      else:
+        self._content = f.read()
+    self._offsets = self._index_lines()
+    self._lines = {}
+
+  def __enter__(self) -> "SourceBuffer":
+    return self
+
+  def __exit__(self, *args) -> None:
+    self.close()
+
+  def __len__(self) -> int:
+    return len(self._offsets) - 1
+
+  def __getitem__(self, idx: int) -> str:
+    if idx < 0:
+      idx += len(self)
+    if idx < 0 or idx >= len(self):
+      raise IndexError("source buffer line out of range")
+
+    line = self._lines.get(idx)
+    if line == None:
+      line = self.line_bytes(idx).decode(self._encoding)
+      # Same newline translation as reading the file in text mode
+      if line.endswith("\r\n"):
+        line = line[:-2] + "\n"
+      self._lines[idx] = line
+    return line
+
+  def __iter__(self) -> Iterator[str]:
+    for idx in range(len(self)):
+      yield self[idx]
+
+  @property
+  def os_path(self) -> str:
+    return self._os_path
+
+  @property
+  def content(self) -> bytes:
+    return self._content
+
+  def line_bytes(self, idx: int) -> bytes:
+    return self._content[self._offsets[idx]:self._offsets[idx + 1]]
+
+  def line_of_offset(self, offset: int) -> int:
+    return bisect_right(self._offsets, offset) - 1
+
+  def close(self) -> None:
+    if isinstance(self._content, mmap.mmap):
+      self._content.close()
+
+  def _index_lines(self) -> List[int]:
+    # Start offset of every line, followed by the size of the content
+    offsets = [0]
+    size = len(self._content)
+    position = self._content.find(b"\n")
+    while position != -1:
+      offsets.append(position + 1)
+      position = self._content.find(b"\n", position + 1)
+    if offsets[-1] != size:
+      offsets.append(size)
+    return offsets
@@ -0,0 +1,82 @@
+from types import MappingProxyType
+from typing import Iterator, List, Mapping, Optional
+
+from support.data_structure import (
+  AttributeType,
+  DataStructure,
+  convert_type_to_size
+)
+
+class AttributeLayout:
+  __slots__ = ("_name", "_type", "_offset", "_size")
+
+  def __init__(self, name: str, type: AttributeType, offset: int, size: int):
+    self._name = name
+    self._type = type
+    self._offset = offset
+    self._size = size
+
+  @property
+  def name(self) -> str:
+    return self._name
+
+  @property
+  def type(self) -> AttributeType:
+    return self._type
+
+  @property
+  def offset(self) -> int:
+    return self._offset
+
+  @property
+  def size(self) -> int:
+    return self._size
+
+class StructLayout:
+  # Immutable view of a data structure, computed once after its declaration
+  def __init__(self, data_structure: DataStructure):
+    attributes = {}
+    size = 0
+    for attribute in data_structure.attribures:
+      attribute_size = convert_type_to_size(attribute.type)
+      attributes[attribute.name] = AttributeLayout(attribute.name,
+                                                   attribute.type,
+                                                   attribute.offset,
+                                                   attribute_size)
+      size += attribute_size
+
+    self._name = data_structure.name
+    self._size = size
+    self._attributes = MappingProxyType(attributes)
+
+  @property
+  def name(self) -> str:
+    return self._name
+
+  @property
+  def size(self) -> int:
+    return self._size
+
+  @property
+  def attributes(self) -> Mapping[str, AttributeLayout]:
+    return self._attributes
+
+  def get_attribute(self, name: str) -> Optional[AttributeLayout]:
+    return self._attributes.get(name)
+
+class StructRegistry:
+  def __init__(self, data_structures: Optional[List[DataStructure]] = None):
+    data_structures = data_structures if data_structures != None else []
+    self._layouts = {x.name: StructLayout(x) for x in data_structures}
+
+  def __len__(self) -> int:
+    return len(self._layouts)
+
+  def __iter__(self) -> Iterator[StructLayout]:
+    return iter(self._layouts.values())
+
+  def __contains__(self, name: str) -> bool:
+    return name in self._layouts
+
+  def get(self, name: str) -> Optional[StructLayout]:
+    return self._layouts.get(name)
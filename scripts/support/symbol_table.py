@@ -0,0 +1,26 @@
+from typing import Iterator, Optional
+
+from support.assembler_identifier import AssemblerIdentifier
+
+class SymbolTable:
+  def __init__(self):
+    self._identifiers = []
+    self._by_name = {}
+
+  def __len__(self) -> int:
+    return len(self._identifiers)
+
+  def __iter__(self) -> Iterator[AssemblerIdentifier]:
+    return iter(self._identifiers)
+
+  def __contains__(self, name: str) -> bool:
+    return name in self._by_name
+
+  def add(self, identifier: AssemblerIdentifier) -> None:
+    self._identifiers.append(identifier)
+    # The first definition of a name is the one reported in diagnostics
+    if identifier.identifier_name not in self._by_name:
+      self._by_name[identifier.identifier_name] = identifier
+
+  def get(self, name: str) -> Optional[AssemblerIdentifier]:
+    return self._by_name.get(name)
@@ -2,6 +2,8 @@ from enums import StorageType
 from support.variable_storage import VariableStorage
 
 class Variable:
+  __slots__ = ("_position", "_name", "_type", "_storage")
+
   def __init__(self, position: int, name: str, type: str, storage: VariableStorage):
     self._position = position
     self._name = name
@@ -1,6 +1,8 @@
 from enums import StorageType
 
 class VariableStorage:
+  __slots__ = ("_storage", "_address")
+
   def __init__(self, storage: StorageType, address: str = ""):
     self._storage = storage
     self._address = address
@@ -1,12 +1,10 @@
 import os
 import re
-import sys
 
 from constants import *
 from support.data_structure import DataStructure
-from support.assembler_identifier import AssemblerIdentifier
-from support.block import Block
-from typing import List
+from support.source_buffer import SourceBuffer
+from typing import List, Optional
 
 class Utils:
   @staticmethod
@@ -22,19 +20,9 @@ class Utils:
       fragment += Utils.extract_line_no_comments(lines[line])
     return fragment
 
-  @staticmethod
-  def get_flat_text(text: List[str]) -> str:
-    flat_text = ""
-    for line in text:
-      flat_text += line
-
-    return flat_text
-
   @staticmethod
   def split_tokens(text: str) -> List[str]:
-    tokens = re.split('\s+', text)
-    tokens = [x for x in tokens if len(x) != 0]
-    return tokens
+    return text.split()
 
   @staticmethod
   def get_alignment(line: str) -> str:
@@ -45,18 +33,14 @@ class Utils:
     return alignment
 
   @staticmethod
-  def load_file_source(file_path: str, include_path: List[str]) -> List[str]:
-    contents = []
+  def load_file_source(file_path: str, include_path: List[str], mapped: bool = False) -> SourceBuffer:
     os_path = ""
     try:
       os_path = os.path.abspath(file_path)
-      with open(os_path) as f:
-        contents = f.readlines()
+      return SourceBuffer(os_path, mapped)
     except:
       raise RuntimeError(f"Unable to open file {os_path}")
 
-    return contents
-
   @staticmethod
   def locate_file(include_path: str,
                   cmd_include_path: List[str],
@@ -71,47 +55,27 @@ class Utils:
     raise RuntimeError(f"Unable to locate file {os_path} found in '{source}' line {line}")
 
   @staticmethod
-  def is_identifier_unique(identifier_list: List[AssemblerIdentifier],
-                           target_identifier: str) -> bool:
-    for id in identifier_list:
-      if id.identifier_name == target_identifier:
-        return False
-    return True
+  def find_file(include_path: str, cmd_include_path: List[str]) -> Optional[str]:
+    # Same lookup as locate_file, for files that may legitimately be missing
+    for path in cmd_include_path:
+      os_path = os.path.join(os.path.abspath(path), include_path)
+      if os.path.exists(os_path):
+        return os_path
+    return None
 
   @staticmethod
-  def is_assembler_identifier(identifier_list: List[AssemblerIdentifier],
-                           target_identifier: str) -> bool:
-    for id in identifier_list:
-      if id.identifier_name == target_identifier:
-        return True
-    return False
+  def is_keyword(token: str) -> bool:
+    return token.lower() in KEYWORD_LOOKUP
 
   @staticmethod
   def is_valid_identifier(identifier: str) -> bool:
-    if identifier in KEYWORDS:
+    if Utils.is_keyword(identifier):
       return False
     elif not re.match(IDENTIFIER_NAME_REGEX, identifier):
       return False
 
     return True
 
-  @staticmethod
-  def find_parent_block_id(line_number: int, blocks: List[Block]) -> int:
-    min_diff = sys.maxsize
-    min_id = -1
-
-    if line_number <= 0:
-      return min_id
-
-    for block in blocks:
-      if line_number >= block.start and line_number <= block.end:
-        diff = abs(block.start - line_number)
-        if min_diff >= diff:
-          min_diff = diff
-          min_id = block.id
-
-    return min_id
-
   @staticmethod
   def convert_string_to_number(number: str, line:int, file:str) -> int:
     integer = 0
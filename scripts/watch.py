@@ -0,0 +1,90 @@
+import os
+import time
+from typing import Callable, List, Optional, Set, Tuple
+
+class WatchJob:
+  def __init__(self, input_file: str, output_file: str):
+    self._input_file = input_file
+    self._output_file = output_file
+    self._dependencies = set([os.path.abspath(input_file)])
+
+  @property
+  def input_file(self) -> str:
+    return self._input_file
+
+  @property
+  def output_file(self) -> str:
+    return self._output_file
+
+  @property
+  def dependencies(self) -> Set[str]:
+    return self._dependencies
+
+  @dependencies.setter
+  def dependencies(self, dependencies: Set[str]) -> None:
+    self._dependencies = dependencies
+
+def get_file_stamp(path: str) -> Optional[Tuple[int, int]]:
+  try:
+    info = os.stat(path)
+  except OSError:
+    return None
+  return (info.st_mtime_ns, info.st_size)
+
+class Watcher:
+  # Polls the include closure of every job and rebuilds only the jobs that
+  # depend on a modified file. The closure is refreshed after each build, so
+  # adding or removing 'include' lines updates what is watched.
+  def __init__(self,
+               jobs: List[WatchJob],
+               build: Callable[[str, str], List[str]],
+               interval: float):
+    self._jobs = jobs
+    self._build = build
+    self._interval = interval
+    self._stamps = {}
+
+  def run(self) -> None:
+    for job in self._jobs:
+      self._run_job(job)
+    self._refresh_stamps()
+
+    while True:
+      time.sleep(self._interval)
+      changed = self._find_changed_files()
+      if len(changed) == 0:
+        continue
+
+      for job in self._jobs:
+        if len(job.dependencies & changed) != 0:
+          self._run_job(job)
+      self._refresh_stamps()
+
+  def _run_job(self, job: WatchJob) -> None:
+    print(f"Processing {job.input_file} -> {job.output_file}")
+    try:
+      included_files = self._build(job.input_file, job.output_file)
+    except Exception as e:
+      # Keep the previous closure so fixing any of its files triggers a rebuild
+      print(f"{type(e).__name__}: {e}")
+      return
+    job.dependencies = set([os.path.abspath(job.input_file)] +
+                           [os.path.abspath(x) for x in included_files])
+
+  def _refresh_stamps(self) -> None:
+    # Known files keep the stamp seen before their rebuild, so changes made
+    # while building are picked up on the next poll
+    watched = set()
+    for job in self._jobs:
+      watched |= job.dependencies
+    self._stamps = {x: self._stamps[x] if x in self._stamps else get_file_stamp(x)
+                    for x in watched}
+
+  def _find_changed_files(self) -> Set[str]:
+    changed = set()
+    for path, stamp in self._stamps.items():
+      current_stamp = get_file_stamp(path)
+      if current_stamp != stamp:
+        self._stamps[path] = current_stamp
+        changed.add(path)
+    return changed
@@ -1,12 +1,4 @@
-array=(`find ./tests -type f -name "*.py"`)
+#!/bin/bash
 
-for test in ${array[@]}
-do
-  if [[ "${test}" == *"__init__.py"* || "${test}" == *"test_case.py"* ]]; then
-    continue
-  fi
-
-  # Run test
-  python3 ${test} /Users/caiooliveira/Projects/gb/gb-hello-world/test
-  [ $? -ne 0 ] && echo "Aborting test" && exit 1
-done
\ No newline at end of file
+# Run every golden test of the tests/ tree
+python3 "$(dirname "$0")/tests/run_tests.py" "$@"
@@ -1 +0,0 @@
-from base import test_case
\ No newline at end of file
@@ -1 +0,0 @@
-from base.test_case import TestCase
\ No newline at end of file
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+
+# Runs every golden test of the tree in-process. A test is a pair of
+# '<name>_input.z80' and '<name>_expected.z80' files in the same directory.
+import argparse
+import difflib
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple
+
+from termcolor import colored
+
+current = os.path.dirname(os.path.realpath(__file__))
+root = os.path.dirname(current)
+sys.path.append(os.path.join(root, "scripts"))
+
+from rgbpre import (
+  get_include_path,
+  preprocess
+)
+from support.pass_context import PassContext
+
+INPUT_SUFFIX = "_input.z80"
+EXPECTED_SUFFIX = "_expected.z80"
+
+class GoldenTest:
+  def __init__(self, name: str, input_file: str, expected_file: str):
+    self._name = name
+    self._input_file = input_file
+    self._expected_file = expected_file
+
+  @property
+  def name(self) -> str:
+    return self._name
+
+  @property
+  def input_file(self) -> str:
+    return self._input_file
+
+  @property
+  def expected_file(self) -> str:
+    return self._expected_file
+
+def find_golden_tests(base_path: str) -> List[GoldenTest]:
+  tests = []
+  for directory, _, files in os.walk(base_path):
+    for file in sorted(files):
+      if not file.endswith(INPUT_SUFFIX):
+        continue
+      expected = file[:-len(INPUT_SUFFIX)] + EXPECTED_SUFFIX
+      if expected not in files:
+        continue
+      name = os.path.relpath(os.path.join(directory, file[:-len(INPUT_SUFFIX)]), base_path)
+      tests.append(GoldenTest(name,
+                              os.path.join(directory, file),
+                              os.path.join(directory, expected)))
+  return sorted(tests, key=lambda x: x.name)
+
+def run_golden_test(test: GoldenTest) -> Tuple[str, bool, str]:
+  # Returns the test name, whether it passed and the failure report
+  include_path = get_include_path([os.path.join(root, "inc")], root)
+  context = PassContext(test.input_file, include_path)
+  try:
+    output = preprocess(context)
+  except Exception as e:
+    return (test.name, False, f"{type(e).__name__}: {e}\n{context.format_diagnostics()}")
+
+  with open(test.expected_file, 'r') as f:
+    expected = f.read()
+  if output == expected:
+    return (test.name, True, "")
+
+  diff = difflib.unified_diff(expected.splitlines(keepends=True),
+                              output.splitlines(keepends=True),
+                              fromfile=test.expected_file,
+                              tofile="output")
+  return (test.name, False, "".join(format_diff_line(x) for x in diff))
+
+def format_diff_line(line: str) -> str:
+  line = line if line.endswith("\n") else line + "\n"
+  if line.startswith("+") and not line.startswith("+++"):
+    return colored(line, 'green')
+  elif line.startswith("-") and not line.startswith("---"):
+    return colored(line, 'red')
+  return line
+
+def main():
+  parser = argparse.ArgumentParser(description='rgbpre golden test runner')
+  parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count(),
+                      help='Number of worker processes')
+  parser.add_argument('-k', '--filter', type=str, default="",
+                      help='Only run the tests whose name contains this text')
+  args = parser.parse_args()
+
+  tests = [x for x in find_golden_tests(current) if args.filter in x.name]
+  if args.jobs <= 1:
+    results = [run_golden_test(x) for x in tests]
+  else:
+    with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+      results = list(executor.map(run_golden_test, tests))
+
+  failures = 0
+  for name, passed, report in results:
+    if passed:
+      print(f"{colored(name, 'cyan')} {colored('PASS', 'green')}")
+    else:
+      failures += 1
+      print(f"{colored(name, 'cyan')} {colored('FAIL', 'red')}\n{report}")
+
+  print(f"\n{len(results) - failures} passed, {failures} failed")
+  return 0 if failures == 0 else 1
+
+if __name__ == "__main__":
+  sys.exit(main())